@@ -3,11 +3,45 @@ import sys
 import os
 import tempfile
 import signal
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Importaciones que el sandbox rechaza
+DANGEROUS_IMPORTS = (
+    'os', 'sys', 'subprocess', 'socket', 'urllib', 'requests',
+    'shutil', 'pathlib', 'glob', 'tempfile', 'pickle'
+)
+
+def _validar_codigo(code: str) -> Optional[str]:
+    """
+    Validación básica previa a la ejecución
+    
+    Returns:
+        Mensaje de error, o None si el código puede ejecutarse
+    """
+    if not code or not code.strip():
+        return "No se proporcionó código para ejecutar"
+    
+    # Verificar código malicioso básico
+    for dangerous in DANGEROUS_IMPORTS:
+        if f"import {dangerous}" in code or f"from {dangerous}" in code:
+            return f"Importación prohibida detectada: {dangerous}"
+    
+    return None
+
+def _entorno_sandbox() -> Dict[str, str]:
+    """Entorno limitado para el subprocess"""
+    return {
+        'PATH': os.environ.get('PATH', ''),
+        'PYTHONPATH': '',
+        'HOME': tempfile.gettempdir(),
+        'PYTHONIOENCODING': 'utf-8',  # Forzar UTF-8 para emojis
+        'PYTHONUTF8': '1'  # Modo UTF-8 en Python 3.7+
+    }
+
 def execute_code(code: str, timeout: int = 5) -> Dict[str, Any]:
     """
     Ejecuta código Python de forma segura en un entorno sandbox
@@ -20,75 +54,30 @@ def execute_code(code: str, timeout: int = 5) -> Dict[str, Any]:
         Dict con status, output y error
     """
     
-    # Validación básica
-    if not code or not code.strip():
+    error = _validar_codigo(code)
+    if error:
         return {
             "status": "error",
             "output": "",
-            "error": "No se proporcionó código para ejecutar"
+            "error": error
         }
     
-    # Verificar código malicioso básico
-    dangerous_imports = [
-        'os', 'sys', 'subprocess', 'socket', 'urllib', 'requests',
-        'shutil', 'pathlib', 'glob', 'tempfile', 'pickle'
-    ]
-    
-    for dangerous in dangerous_imports:
-        if f"import {dangerous}" in code or f"from {dangerous}" in code:
-            return {
-                "status": "error",
-                "output": "",
-                "error": f"Importación prohibida detectada: {dangerous}"
-            }
-    
-    # Crear archivo temporal para el código
+    # El código va por stdin: sin archivo temporal que crear ni limpiar.
+    # subprocess.run mata al hijo por sí mismo si vence el timeout
     try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
-        
-        # Ejecutar en subprocess con restricciones
         result = subprocess.run(
-            [sys.executable, temp_file_path],
+            [sys.executable, '-'],
+            input=code,
             capture_output=True,
             text=True,
             timeout=timeout,
             cwd=tempfile.gettempdir(),  # Ejecutar en directorio temporal
-            env={  # Entorno limitado
-                'PATH': os.environ.get('PATH', ''),
-                'PYTHONPATH': '',
-                'HOME': tempfile.gettempdir(),
-                'PYTHONIOENCODING': 'utf-8',  # Forzar UTF-8 para emojis
-                'PYTHONUTF8': '1'  # Modo UTF-8 en Python 3.7+
-            },
+            env=_entorno_sandbox(),  # Entorno limitado
             encoding='utf-8',  # Especificar encoding explícitamente
             errors='replace'   # Reemplazar caracteres problemáticos
         )
-        
-        # Limpiar archivo temporal
-        os.unlink(temp_file_path)
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "output": result.stdout,
-                "error": result.stderr if result.stderr else None
-            }
-        else:
-            return {
-                "status": "error",
-                "output": result.stdout,
-                "error": result.stderr
-            }
     
     except subprocess.TimeoutExpired:
-        # Limpiar archivo temporal en caso de timeout
-        try:
-            os.unlink(temp_file_path)
-        except:
-            pass
-        
         return {
             "status": "error",
             "output": "",
@@ -96,15 +85,101 @@ def execute_code(code: str, timeout: int = 5) -> Dict[str, Any]:
         }
     
     except Exception as e:
-        # Limpiar archivo temporal en caso de error
-        try:
-            os.unlink(temp_file_path)
-        except:
-            pass
-        
         logger.error(f"Error ejecutando código: {str(e)}")
         return {
             "status": "error",
             "output": "",
             "error": f"Error de ejecución: {str(e)}"
-        }
\ No newline at end of file
+        }
+    
+    if result.returncode == 0:
+        return {
+            "status": "success",
+            "output": result.stdout,
+            "error": result.stderr if result.stderr else None
+        }
+    return {
+        "status": "error",
+        "output": result.stdout,
+        "error": result.stderr
+    }
+
+def execute_code_stream(code: str, timeout: int = 5) -> Iterator[Dict[str, Any]]:
+    """
+    Ejecuta código Python en el sandbox emitiendo la salida según se produce
+    
+    Args:
+        code: Código Python a ejecutar
+        timeout: Tiempo límite en segundos (default: 5)
+    
+    Yields:
+        Dicts {"type": "output", "data": línea} por cada línea de stdout y
+        un último {"type": "status", "status": ..., "error": ...}
+    """
+    error = _validar_codigo(code)
+    if error:
+        yield {"type": "status", "status": "error", "error": error}
+        return
+    
+    try:
+        # stderr va a un archivo temporal: leer solo stdout por pipe evita bloqueos
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8', errors='replace') as stderr_file:
+            process = subprocess.Popen(
+                [sys.executable, '-u', '-'],  # -u: sin buffer, la salida llega en vivo
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                cwd=tempfile.gettempdir(),
+                env=_entorno_sandbox(),
+                encoding='utf-8',
+                errors='replace'
+            )
+            
+            # El intérprete lee todo stdin antes de ejecutar: escribir y cerrar no bloquea
+            process.stdin.write(code)
+            process.stdin.close()
+            
+            # El timeout mata el proceso aunque no esté escribiendo nada
+            timed_out = threading.Event()
+            
+            def _matar():
+                timed_out.set()
+                process.kill()
+            
+            timer = threading.Timer(timeout, _matar)
+            timer.start()
+            try:
+                for line in process.stdout:
+                    yield {"type": "output", "data": line}
+                returncode = process.wait()
+            finally:
+                timer.cancel()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+            
+            if timed_out.is_set():
+                yield {
+                    "type": "status",
+                    "status": "error",
+                    "error": f"Tiempo de ejecución excedido ({timeout}s)"
+                }
+                return
+            
+            stderr_file.seek(0)
+            stderr = stderr_file.read()
+        
+        yield {
+            "type": "status",
+            "status": "success" if returncode == 0 else "error",
+            "error": stderr if stderr else None
+        }
+    
+    except Exception as e:
+        logger.error(f"Error ejecutando código: {str(e)}")
+        yield {
+            "type": "status",
+            "status": "error",
+            "error": f"Error de ejecución: {str(e)}"
+        }
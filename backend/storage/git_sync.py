@@ -11,16 +11,172 @@ Sistema de sincronización automática con Git que permite:
 
 import asyncio
 import logging
-import subprocess
 import os
-import json
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import random
+import time
+from collections.abc import Mapping
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timezone
 from pathlib import Path
-import hashlib
+
+# Watcher de archivos basado en eventos (opcional)
+try:
+    from watchfiles import DefaultFilter, awatch
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+
+class GitError(Exception):
+    """Error al ejecutar un comando git"""
+    
+    def __init__(self, message: str, returncode: Optional[int] = None):
+        super().__init__(message)
+        self.returncode = returncode
+
+class TransientGitError(GitError):
+    """Error transitorio de git (red, index.lock ocupado); se puede reintentar"""
+    pass
+
+class PermanentGitError(GitError):
+    """Error permanente de git (conflicto, autenticación, etc.)"""
+    pass
+
+
+# Campos de get_commit_history, en el orden del formato de git log
+_COMMIT_FIELDS = ('hash', 'author_name', 'author_email', 'date', 'message')
+_COMMIT_FIELD_INDEX = {name: i for i, name in enumerate(_COMMIT_FIELDS)}
+_COMMIT_LOG_FORMAT = '--pretty=tformat:%H%x00%an%x00%ae%x00%ad%x00%s'
+
+# Número de campos separados por espacio antes de la ruta en cada tipo de
+# entrada de `git status --porcelain=v2` (1: normal, 2: renombrado, u: conflicto)
+_STATUS_PATH_FIELDS = {ord('1'): 8, ord('2'): 9, ord('u'): 10}
+
+# Con el watcher activo, el auto-commit periódico queda solo como respaldo
+_WATCH_FALLBACK_INTERVAL = 3600  # 1 hora
+
+# Máximo de procesos git simultáneos entre todas las instancias del proceso
+_MAX_CONCURRENT_GIT = os.cpu_count() or 4
+_git_semaphore: Optional[asyncio.Semaphore] = None
+_git_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Reintentos ante errores transitorios de git (backoff exponencial con jitter)
+_GIT_MAX_RETRIES = 3
+_TRANSIENT_GIT_ERRORS = (
+    'index.lock',
+    'could not resolve host',
+    'connection reset',
+    'connection timed out',
+    'the remote end hung up unexpectedly',
+    'early eof',
+)
+_IDEMPOTENT_GIT_COMMANDS = {'status', 'fetch', 'push', 'log', 'remote', 'config'}
+
+# Patrones ignorados por defecto en repositorios creados por RepletO
+_DEFAULT_GITIGNORE = b"""# RepletO Generated Files
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+build/
+develop-eggs/
+dist/
+downloads/
+eggs/
+.eggs/
+lib/
+lib64/
+parts/
+sdist/
+var/
+wheels/
+share/python-wheels/
+*.egg-info/
+.installed.cfg
+*.egg
+MANIFEST
+
+# IDEs
+.vscode/
+.idea/
+*.swp
+*.swo
+
+# OS
+.DS_Store
+Thumbs.db
+
+# Logs
+*.log
+
+# Environment
+.env
+.venv/
+env/
+venv/
+
+# RepletO specific
+repleto_temp/
+*.repleto.bak
+"""
+
+
+def _get_git_semaphore() -> asyncio.Semaphore:
+    """Semáforo global que limita los procesos git concurrentes (uno por event loop)"""
+    global _git_semaphore, _git_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _git_semaphore is None or _git_semaphore_loop is not loop:
+        _git_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_GIT)
+        _git_semaphore_loop = loop
+    return _git_semaphore
+
+
+def _read_core_bare(config_path: Path) -> bool:
+    """Valor de core.bare en un archivo de configuración de git (False si no está)"""
+    section = ''
+    for raw_line in config_path.read_text(errors='replace').splitlines():
+        line = raw_line.strip()
+        if line.startswith('['):
+            section = line[1:line.find(']')].strip().lower()
+        elif section == 'core':
+            key, sep, value = line.partition('=')
+            if key.strip().lower() == 'bare':
+                # "bare" sin valor equivale a true
+                value = value.split('#', 1)[0].split(';', 1)[0].strip().lower() if sep else 'true'
+                return value in ('true', 'yes', 'on', '1')
+    return False
+
+
+class CommitRecord(Mapping):
+    """
+    Commit del historial con decodificación perezosa
+    
+    Se comporta como un dict de solo lectura; cada campo se decodifica
+    de bytes a str únicamente cuando se accede a él.
+    """
+    
+    __slots__ = ('_fields',)
+    
+    def __init__(self, fields: List[bytes]):
+        self._fields = fields
+    
+    def __getitem__(self, key: str) -> str:
+        return self._fields[_COMMIT_FIELD_INDEX[key]].decode()
+    
+    def __iter__(self):
+        return iter(_COMMIT_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(_COMMIT_FIELDS)
+    
+    def __repr__(self) -> str:
+        return f"CommitRecord({dict(self)!r})"
+
+
 class GitSyncManager:
     """
     Gestor de sincronización automática con Git
@@ -31,7 +187,9 @@ class GitSyncManager:
                  auto_commit_interval: int = 300,  # 5 minutos
                  auto_push_interval: int = 1800,   # 30 minutos
                  enable_auto_branch: bool = True,
-                 branch_prefix: str = "repleto-auto"):
+                 branch_prefix: str = "repleto-auto",
+                 watch_changes: bool = True,
+                 watch_debounce: float = 1.0):
         """
         Inicializar gestor de Git
         
@@ -41,18 +199,28 @@ class GitSyncManager:
             auto_push_interval: Intervalo de auto-push en segundos
             enable_auto_branch: Crear branches automáticos para experimentos
             branch_prefix: Prefijo para branches automáticos
+            watch_changes: Hacer auto-commit al detectar cambios (requiere watchfiles)
+            watch_debounce: Espera en segundos tras un cambio antes del commit
         """
         self.repo_path = Path(repo_path).resolve()
         self.auto_commit_interval = auto_commit_interval
         self.auto_push_interval = auto_push_interval
         self.enable_auto_branch = enable_auto_branch
         self.branch_prefix = branch_prefix
+        self.watch_changes = watch_changes
+        self.watch_debounce = watch_debounce
         
         # Estado interno
         self.last_commit_hash = None
         self.last_push_time = None
         self.auto_sync_enabled = False
         self.current_experiment_branch = None
+        self._watcher_active = False
+        self._stop_event: Optional[asyncio.Event] = None
+        self._last_push_monotonic = 0.0
+        self._remotes_cache: Optional[Dict[str, str]] = None
+        self._history_cache: Dict[int, Tuple[str, List[CommitRecord]]] = {}  # limit -> (HEAD, commits)
+        self._is_bare: Optional[bool] = None  # se decide una vez que el repositorio existe
         
         # Archivos a ignorar en auto-commits
         self.ignore_patterns = {
@@ -69,75 +237,70 @@ class GitSyncManager:
         
         logger.info(f"GitSyncManager inicializado para {self.repo_path}")
 
-    async def initialize_repo(self) -> Dict[str, any]:
+    async def initialize_repo(self,
+                              remote_url: Optional[str] = None,
+                              partial_clone: bool = True,
+                              convert_existing: bool = False) -> Dict[str, any]:
         """
         Inicializar repositorio Git si no existe
         
+        Args:
+            remote_url: URL del remoto a seguir (si el repo no existe, se clona)
+            partial_clone: Clonar como partial clone (--filter=blob:none): los blobs
+                se descargan bajo demanda y los branches de experimento son baratos
+            convert_existing: Convertir también un repositorio existente en partial
+                clone. Requiere git >= 2.36 y vuelve a descargar todo el remoto
+            
         Returns:
             Estado de inicialización
         """
         try:
             if not self._is_git_repo():
-                await self._run_git_command(['init'])
+                if remote_url:
+                    clone_command = ['clone']
+                    if partial_clone:
+                        clone_command += ['--filter=blob:none', '--single-branch']
+                    clone_command += [remote_url, str(self.repo_path)]
+                    
+                    self.repo_path.parent.mkdir(parents=True, exist_ok=True)
+                    success, output = await self._run_git_command(
+                        clone_command, cwd=self.repo_path.parent
+                    )
+                    if not success:
+                        return {'status': 'error', 'message': f'Error clonando {remote_url}: {output}'}
+                else:
+                    await self._run_git_command(['init'])
+                self._is_bare = None
                 
-                # Crear .gitignore básico
-                gitignore_path = self.repo_path / '.gitignore'
-                if not gitignore_path.exists():
-                    gitignore_content = """# RepletO Generated Files
-__pycache__/
-*.py[cod]
-*$py.class
-*.so
-.Python
-build/
-develop-eggs/
-dist/
-downloads/
-eggs/
-.eggs/
-lib/
-lib64/
-parts/
-sdist/
-var/
-wheels/
-share/python-wheels/
-*.egg-info/
-.installed.cfg
-*.egg
-MANIFEST
-
-# IDEs
-.vscode/
-.idea/
-*.swp
-*.swo
-
-# OS
-.DS_Store
-Thumbs.db
-
-# Logs
-*.log
-
-# Environment
-.env
-.venv/
-env/
-venv/
-
-# RepletO specific
-repleto_temp/
-*.repleto.bak
-"""
-                    gitignore_path.write_text(gitignore_content)
-                    await self._run_git_command(['add', '.gitignore'])
-                    await self._run_git_command(['commit', '-m', 'Initial RepletO setup'])
+                # Patrones de RepletO en .git/info/exclude: locales al repo y sin
+                # necesidad de un commit extra de .gitignore. La ruta la da git
+                # (bare, worktree, GIT_DIR, ...); es relativa al repositorio
+                success, exclude_output = await self._run_git_command(
+                    ['rev-parse', '--git-path', 'info/exclude'], read_only=True
+                )
+                if not success:
+                    return {'status': 'error', 'message': f'Repositorio no válido tras crearlo: {exclude_output}'}
+                exclude_path = self.repo_path / exclude_output
+                exclude_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(exclude_path, 'ab') as exclude_file:
+                    exclude_file.write(_DEFAULT_GITIGNORE)
+                
+                if remote_url:
+                    logger.info(f"Repositorio Git clonado desde {remote_url}")
+                    return {'status': 'cloned', 'message': 'Repositorio Git clonado exitosamente'}
                 
                 logger.info("Repositorio Git inicializado")
                 return {'status': 'initialized', 'message': 'Repositorio Git creado exitosamente'}
             
             else:
+                if remote_url:
+                    status = await self.get_repo_status()
+                    if 'origin' not in status.get('remotes', {}):
+                        await self._run_git_command(['remote', 'add', 'origin', remote_url])
+                        self._remotes_cache = None
+                    if convert_existing:
+                        await self._enable_partial_clone('origin')
+                
                 status = await self.get_repo_status()
                 logger.info("Repositorio Git existente detectado")
                 return {'status': 'existing', 'repo_status': status}
@@ -146,46 +309,322 @@ repleto_temp/
             logger.error(f"Error inicializando repositorio: {e}")
             return {'status': 'error', 'message': str(e)}
 
+    async def _enable_partial_clone(self, remote: str) -> bool:
+        """
+        Convertir un repositorio existente en partial clone (blob:none)
+        
+        Args:
+            remote: Nombre del remoto
+            
+        Returns:
+            True si el remoto queda configurado como promisor
+        """
+        success, promisor = await self._run_git_command(
+            ['config', '--default', 'false', '--get', f'remote.{remote}.promisor'], read_only=True
+        )
+        if success and promisor == 'true':
+            return True
+        
+        # La configuración se escribe solo tras un refetch correcto: si quedara puesta
+        # tras un fallo, las siguientes llamadas darían el repo por convertido
+        success, output = await self._run_git_command(
+            ['fetch', '--refetch', '--filter=blob:none', remote]
+        )
+        if not success:
+            logger.warning(f"Refetch de partial clone falló: {output}")
+            # git puede haber registrado el filtro antes de fallar
+            for key in ('promisor', 'partialCloneFilter'):
+                await self._run_git_command(['config', '--unset', f'remote.{remote}.{key}'])
+            return False
+        
+        for key, value in (('promisor', 'true'), ('partialCloneFilter', 'blob:none')):
+            success, output = await self._run_git_command(['config', f'remote.{remote}.{key}', value])
+            if not success:
+                logger.warning(f"No se pudo configurar partial clone: {output}")
+                return False
+        return True
+
+    @property
+    def is_bare(self) -> bool:
+        """
+        Si la ruta es un repositorio bare (sin work tree)
+        
+        Se decide una sola vez, en cuanto el repositorio existe: con .git es un
+        work tree (aunque la carpeta se llame proj.git); sin él manda core.bare.
+        """
+        if self._is_bare is None:
+            if (self.repo_path / '.git').exists():
+                self._is_bare = False
+            elif (self.repo_path / 'config').is_file() and (self.repo_path / 'HEAD').is_file():
+                self._is_bare = _read_core_bare(self.repo_path / 'config')
+            else:
+                # Aún no hay repositorio: no se cachea
+                return False
+        return self._is_bare
+
+    @property
+    def git_dir(self) -> Path:
+        """Directorio con los datos de Git (.git o el propio repo si es bare)
+        
+        En un worktree o submódulo .git es un archivo "gitdir: <ruta>" que apunta
+        al directorio real.
+        """
+        if self.is_bare:
+            return self.repo_path
+        dot_git = self.repo_path / '.git'
+        if dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if content.startswith('gitdir: '):
+                return (self.repo_path / content[8:]).resolve()
+        return dot_git
+
+    @property
+    def common_dir(self) -> Path:
+        """Directorio compartido entre worktrees (refs, packed-refs, objects)"""
+        git_dir = self.git_dir
+        try:
+            return (git_dir / (git_dir / 'commondir').read_text().strip()).resolve()
+        except FileNotFoundError:
+            return git_dir
+
+    @classmethod
+    async def gather_statuses(cls, managers: List['GitSyncManager']) -> Dict[str, Dict[str, any]]:
+        """
+        Obtener el estado de varios repositorios en paralelo
+        
+        Cada repositorio tiene su propio index.lock, así que las consultas son
+        independientes; el semáforo global de git acota los procesos simultáneos.
+        
+        Args:
+            managers: Gestores de los repositorios a consultar
+            
+        Returns:
+            Estado de cada repositorio, indexado por su ruta
+        """
+        statuses = await asyncio.gather(*(manager.get_repo_status() for manager in managers))
+        return {str(manager.repo_path): status for manager, status in zip(managers, statuses)}
+
     def _is_git_repo(self) -> bool:
         """Verificar si la ruta es un repositorio Git"""
+        if self.is_bare:
+            return (self.repo_path / 'HEAD').is_file()
         return (self.repo_path / '.git').exists()
 
+    def _resolve_head_ref(self) -> Optional[Path]:
+        """
+        Resolver la referencia simbólica de .git/HEAD
+        
+        Returns:
+            Ruta del archivo de la referencia (ej. .git/refs/heads/main) o
+            None si HEAD está desacoplado
+            
+        Raises:
+            OSError: El layout de .git no se pudo leer
+        """
+        # HEAD es propio de cada worktree; los branches viven en el directorio común
+        head = (self.git_dir / 'HEAD').read_text().strip()
+        if head.startswith('ref: '):
+            return self.common_dir / head[5:]
+        return None
+
+    def _current_head_sha(self) -> Optional[str]:
+        """
+        Obtener el hash de HEAD leyendo .git directamente (sin rev-parse)
+        
+        HEAD se vuelve a leer en cada llamada: el usuario puede cambiar de
+        branch fuera de RepletO y la referencia guardada quedaría obsoleta.
+        
+        Returns:
+            Hash del commit actual o None si el branch aún no tiene commits
+            
+        Raises:
+            OSError: El layout de .git no se pudo leer
+        """
+        head_ref_path = self._resolve_head_ref()
+        if head_ref_path is None:
+            # HEAD desacoplado: el archivo contiene el hash directamente
+            return (self.git_dir / 'HEAD').read_text().strip()
+        
+        try:
+            return head_ref_path.read_text().strip()
+        except FileNotFoundError:
+            pass
+        
+        # La referencia puede estar empaquetada en packed-refs
+        common_dir = self.common_dir
+        ref_name = head_ref_path.relative_to(common_dir).as_posix()
+        try:
+            with open(common_dir / 'packed-refs') as packed_refs:
+                for line in packed_refs:
+                    sha, _, name = line.rstrip('\n').partition(' ')
+                    if name == ref_name:
+                        return sha
+        except FileNotFoundError:
+            pass
+        
+        return None
+
+    async def _head_sha(self) -> Optional[str]:
+        """Hash de HEAD; si .git no se puede leer directamente, con git rev-parse"""
+        try:
+            return self._current_head_sha()
+        except OSError as e:
+            logger.debug(f"No se pudo leer HEAD directamente ({e}), usando rev-parse")
+        success, output = await self._run_git_command(
+            ['rev-parse', '--verify', '--quiet', 'HEAD'], read_only=True
+        )
+        return output if success and output else None
+
+    def _bare_branch_name(self) -> str:
+        """Nombre del branch apuntado por HEAD en un repositorio bare"""
+        head_ref = self._resolve_head_ref()
+        if head_ref is None:
+            return 'HEAD'
+        return head_ref.relative_to(self.common_dir / 'refs' / 'heads').as_posix()
+
+    def _build_git_command(self, command: List[str], read_only: bool) -> List[str]:
+        """Construir la línea de comando git con las opciones de solo lectura"""
+        full_command = ['git']
+        if read_only:
+            full_command.append('--no-optional-locks')
+            if self.is_bare:
+                full_command.append(f'--git-dir={self.repo_path}')
+        return full_command + command
+
     async def _run_git_command(self, 
                               command: List[str], 
-                              capture_output: bool = True) -> Tuple[bool, str]:
+                              capture_output: bool = True,
+                              decode: bool = True,
+                              read_only: bool = False,
+                              cwd: Optional[Path] = None) -> Tuple[bool, Union[str, bytes]]:
         """
         Ejecutar comando Git de forma asíncrona
         
         Args:
             command: Lista de argumentos del comando git
-            capture_output: Si capturar la salida
+            capture_output: Si capturar la salida (si False se descarta en DEVNULL)
+            decode: Si decodificar la salida a str (si False se devuelven bytes)
+            read_only: Comando de solo lectura; no toma .git/index.lock y en
+                repositorios bare apunta directamente con --git-dir
+            cwd: Directorio de trabajo (por defecto el repositorio)
             
         Returns:
             Tupla (éxito, salida)
         """
-        try:
-            full_command = ['git'] + command
+        full_command = self._build_git_command(command, read_only)
+        
+        for attempt in range(_GIT_MAX_RETRIES + 1):
+            try:
+                output = await self._exec_git(full_command, capture_output, cwd)
+                if decode:
+                    return True, output.decode().strip()
+                return True, output.strip()
+                
+            except TransientGitError as e:
+                if attempt < _GIT_MAX_RETRIES and self._is_retryable(command, e):
+                    delay = 0.1 * 2 ** attempt + random.uniform(0, 0.05)
+                    logger.info(f"Error transitorio en git {' '.join(command)}, reintentando en {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                logger.warning(f"Git command failed: {' '.join(command)} - {e}")
+                return False, str(e)
+                
+            except GitError as e:
+                logger.warning(f"Git command failed: {' '.join(command)} - {e}")
+                return False, str(e)
+                
+            except Exception as e:
+                logger.error(f"Error ejecutando git {' '.join(command)}: {e}")
+                return False, str(e)
+
+    async def _exec_git(self,
+                        full_command: List[str],
+                        capture_output: bool,
+                        cwd: Optional[Path]) -> bytes:
+        """
+        Ejecutar un proceso git una vez
+        
+        Returns:
+            Salida estándar en bytes
             
+        Raises:
+            TransientGitError: Fallo que puede resolverse reintentando
+            PermanentGitError: Cualquier otro fallo
+        """
+        pipe = asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL
+        
+        async with _get_git_semaphore():
             process = await asyncio.create_subprocess_exec(
                 *full_command,
-                cwd=self.repo_path,
-                stdout=asyncio.subprocess.PIPE if capture_output else None,
-                stderr=asyncio.subprocess.PIPE if capture_output else None
+                cwd=cwd or self.repo_path,
+                stdout=pipe,
+                stderr=pipe
             )
             
             stdout, stderr = await process.communicate()
+        
+        if process.returncode == 0:
+            return stdout or b""
+        
+        error = stderr.decode() if stderr else "Unknown git error"
+        lowered = error.lower()
+        if any(pattern in lowered for pattern in _TRANSIENT_GIT_ERRORS):
+            raise TransientGitError(error, process.returncode)
+        raise PermanentGitError(error, process.returncode)
+
+    @staticmethod
+    def _is_retryable(command: List[str], error: TransientGitError) -> bool:
+        """
+        Decidir si un comando fallido puede reintentarse sin efectos duplicados
+        
+        Los comandos idempotentes siempre; el resto solo si falló por
+        index.lock, porque en ese caso git aborta antes de modificar nada.
+        """
+        return command[0] in _IDEMPOTENT_GIT_COMMANDS or 'index.lock' in str(error)
+
+    async def _run_git_command_stream(self,
+                                      command: List[str],
+                                      read_only: bool = False) -> AsyncIterator[bytes]:
+        """
+        Ejecutar comando Git emitiendo su salida línea a línea
+        
+        Si el consumidor deja de iterar antes del final, el proceso se termina.
+        Ocupa una plaza del semáforo global de git hasta que el proceso termina.
+        
+        Args:
+            command: Lista de argumentos del comando git
+            read_only: Comando de solo lectura (ver _run_git_command)
             
-            if process.returncode == 0:
-                output = stdout.decode() if stdout else ""
-                return True, output.strip()
-            else:
-                error = stderr.decode() if stderr else "Unknown git error"
-                logger.warning(f"Git command failed: {' '.join(command)} - {error}")
-                return False, error
-                
-        except Exception as e:
-            logger.error(f"Error ejecutando git {' '.join(command)}: {e}")
-            return False, str(e)
+        Yields:
+            Líneas de stdout en bytes, incluyendo el salto de línea
+            
+        Raises:
+            GitError: El comando terminó con código distinto de cero
+        """
+        # El semáforo se mantiene mientras viva el proceso, no solo al lanzarlo
+        async with _get_git_semaphore():
+            process = await asyncio.create_subprocess_exec(
+                *self._build_git_command(command, read_only),
+                cwd=self.repo_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            
+            finished = False
+            try:
+                async for line in process.stdout:
+                    yield line
+                finished = True
+            finally:
+                if not finished and process.returncode is None:
+                    process.kill()
+                await process.wait()
+        
+        if process.returncode != 0:
+            raise GitError(
+                f"Git command failed: {' '.join(command)} (exit {process.returncode})",
+                process.returncode
+            )
 
     async def get_repo_status(self) -> Dict[str, any]:
         """
@@ -198,56 +637,99 @@ repleto_temp/
             if not self._is_git_repo():
                 return {'status': 'not_git_repo'}
             
-            # Estado de archivos
-            success, status_output = await self._run_git_command(['status', '--porcelain'])
-            if not success:
-                return {'status': 'error', 'message': status_output}
-            
-            # Branch actual
-            success, branch_output = await self._run_git_command(['branch', '--show-current'])
-            current_branch = branch_output if success else 'unknown'
+            # Estado de archivos + cabecera de branch en una sola llamada
+            if self.is_bare:
+                # Sin work tree no hay archivos que revisar, solo refs
+                status_output = b''
+            else:
+                success, status_output = await self._run_git_command(
+                    ['status', '--porcelain=v2', '--branch', '-z'],
+                    decode=False, read_only=True
+                )
+                if not success:
+                    return {'status': 'error', 'message': status_output}
             
             # Último commit
-            success, commit_output = await self._run_git_command(['log', '-1', '--oneline'])
+            success, commit_output = await self._run_git_command(
+                ['log', '-1', '--oneline'], read_only=True
+            )
             last_commit = commit_output if success else 'No commits'
             
-            # Archivos modificados
+            # Archivos modificados: recorrer las entradas separadas por NUL
+            current_branch = self._bare_branch_name() if self.is_bare else 'unknown'
+            ahead = 0
+            behind = 0
             modified_files = []
             untracked_files = []
             staged_files = []
             
-            for line in status_output.split('\n'):
-                if line.strip():
-                    status_code = line[:2]
-                    filename = line[3:]
+            pos = 0
+            output_len = len(status_output)
+            while pos < output_len:
+                end = status_output.find(b'\0', pos)
+                if end == -1:
+                    end = output_len
+                
+                kind = status_output[pos]
+                if kind == 0x23:  # '#'
+                    # Cabeceras: "# branch.head <name>", "# branch.ab +N -M"
+                    header, _, value = status_output[pos + 2:end].partition(b' ')
+                    if header == b'branch.head':
+                        current_branch = value.decode()
+                    elif header == b'branch.ab':
+                        ahead_str, _, behind_str = value.partition(b' ')
+                        ahead = int(ahead_str[1:])
+                        behind = int(behind_str[1:])
+                elif kind == 0x3F:  # '?'
+                    untracked_files.append(status_output[pos + 2:end].decode())
+                elif kind in _STATUS_PATH_FIELDS:
+                    path_start = pos
+                    for _ in range(_STATUS_PATH_FIELDS[kind]):
+                        path_start = status_output.index(b' ', path_start) + 1
+                    filename = status_output[path_start:end].decode()
                     
-                    if status_code == '??':
-                        untracked_files.append(filename)
-                    elif status_code[0] != ' ':
+                    if status_output[pos + 2] != 0x2E:  # X != '.'
                         staged_files.append(filename)
-                    elif status_code[1] != ' ':
+                    elif status_output[pos + 3] != 0x2E:  # Y != '.'
                         modified_files.append(filename)
+                    
+                    if kind == 0x32:  # '2': la ruta original va en el siguiente campo
+                        end = status_output.find(b'\0', end + 1)
+                        if end == -1:
+                            end = output_len
+                
+                pos = end + 1
             
-            # Información de remoto
-            success, remote_output = await self._run_git_command(['remote', '-v'])
-            remotes = {}
-            if success:
-                for line in remote_output.split('\n'):
-                    if line.strip():
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            name = parts[0]
-                            url = parts[1]
-                            remotes[name] = url
+            # Información de remoto (cacheada: los remotos rara vez cambian)
+            if self._remotes_cache is None:
+                success, remote_output = await self._run_git_command(
+                    ['remote', '-v'], decode=False, read_only=True
+                )
+                if not success:
+                    remote_output = b''
+                
+                remotes = {}
+                for line in remote_output.split(b'\n'):
+                    name, _, rest = line.partition(b'\t')
+                    if rest:
+                        remotes[name.decode()] = rest.partition(b' ')[0].decode()
+                
+                if success:
+                    self._remotes_cache = remotes
+            else:
+                remotes = self._remotes_cache
             
             return {
                 'status': 'ok',
                 'current_branch': current_branch,
                 'last_commit': last_commit,
+                'ahead': ahead,
+                'behind': behind,
+                'has_changes': bool(modified_files or untracked_files or staged_files),
                 'modified_files': modified_files,
                 'untracked_files': untracked_files,
                 'staged_files': staged_files,
-                'remotes': remotes,
+                'remotes': dict(remotes),
                 'auto_sync_enabled': self.auto_sync_enabled,
                 'last_push_time': self.last_push_time.isoformat() if self.last_push_time else None
             }
@@ -258,13 +740,15 @@ repleto_temp/
 
     async def stage_and_commit(self, 
                               message: Optional[str] = None,
-                              files: Optional[List[str]] = None) -> Dict[str, any]:
+                              files: Optional[List[str]] = None,
+                              status: Optional[Dict[str, any]] = None) -> Dict[str, any]:
         """
         Hacer stage y commit de archivos
         
         Args:
             message: Mensaje de commit (si None, se genera automático)
             files: Lista de archivos (si None, todos los modificados)
+            status: Estado ya obtenido con get_repo_status (evita repetirlo)
             
         Returns:
             Resultado del commit
@@ -276,7 +760,8 @@ repleto_temp/
             # Determinar archivos a commitear
             if files is None:
                 # Auto-detectar archivos modificados (excluyendo patrones ignorados)
-                status = await self.get_repo_status()
+                if status is None:
+                    status = await self.get_repo_status()
                 if status['status'] != 'ok':
                     return status
                 
@@ -300,7 +785,7 @@ repleto_temp/
             
             # Generar mensaje automático si no se proporciona
             if message is None:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
                 file_count = len(files)
                 message = f"RepletO auto-commit: {file_count} file(s) updated at {timestamp}"
             
@@ -310,8 +795,7 @@ repleto_temp/
                 return {'status': 'error', 'message': f'Error en commit: {output}'}
             
             # Obtener hash del commit
-            success, hash_output = await self._run_git_command(['rev-parse', 'HEAD'])
-            commit_hash = hash_output if success else 'unknown'
+            commit_hash = await self._head_sha() or 'unknown'
             
             self.last_commit_hash = commit_hash
             
@@ -345,47 +829,60 @@ repleto_temp/
             if not self._is_git_repo():
                 return {'status': 'error', 'message': 'No es un repositorio Git'}
             
-            # Obtener branch actual si no se especifica
+            # Una sola consulta de estado: branch actual + cambios pendientes
+            status = await self.get_repo_status()
+            if status['status'] != 'ok':
+                return {'status': 'error', 'message': status.get('message', 'No se pudo obtener el estado')}
+            
             if branch is None:
-                success, branch_output = await self._run_git_command(['branch', '--show-current'])
-                if not success:
-                    return {'status': 'error', 'message': 'No se pudo determinar el branch actual'}
-                branch = branch_output
+                branch = status['current_branch']
             
             # Verificar si hay commits pendientes
-            success, status = await self._run_git_command(['status', '--porcelain'])
-            if success and status.strip():
+            if status['has_changes']:
                 logger.info("Hay cambios pendientes, haciendo auto-commit antes del push")
-                commit_result = await self.stage_and_commit()
-                if commit_result['status'] != 'success':
+                commit_result = await self.stage_and_commit(status=status)
+                if commit_result['status'] not in ('success', 'no_changes'):
                     return {'status': 'error', 'message': f'Auto-commit falló: {commit_result.get("message")}'}
             
-            # Push
-            success, output = await self._run_git_command(['push', remote, branch])
-            if not success:
-                # Si falla, podría ser porque el branch no existe en remoto
-                if 'has no upstream branch' in output:
-                    logger.info(f"Branch {branch} no existe en remoto, creando upstream")
-                    success, output = await self._run_git_command(['push', '--set-upstream', remote, branch])
-                
-                if not success:
-                    return {'status': 'error', 'message': f'Error en push: {output}'}
-            
-            self.last_push_time = datetime.now()
-            
-            logger.info(f"Push exitoso a {remote}/{branch}")
-            
-            return {
-                'status': 'success',
-                'remote': remote,
-                'branch': branch,
-                'push_time': self.last_push_time.isoformat()
-            }
+            return await self._push_branch(remote, branch)
             
         except Exception as e:
             logger.error(f"Error en push_to_remote: {e}")
             return {'status': 'error', 'message': str(e)}
 
+    async def _push_branch(self, remote: str, branch: str) -> Dict[str, any]:
+        """
+        Pushear un branch sin revisar cambios pendientes
+        
+        Args:
+            remote: Nombre del remoto
+            branch: Branch a pushear
+            
+        Returns:
+            Resultado del push
+        """
+        success, output = await self._run_git_command(['push', remote, branch])
+        if not success:
+            # Si falla, podría ser porque el branch no existe en remoto
+            if 'has no upstream branch' in output:
+                logger.info(f"Branch {branch} no existe en remoto, creando upstream")
+                success, output = await self._run_git_command(['push', '--set-upstream', remote, branch])
+            
+            if not success:
+                return {'status': 'error', 'message': f'Error en push: {output}'}
+        
+        self.last_push_time = datetime.now(timezone.utc)
+        self._last_push_monotonic = time.monotonic()
+        
+        logger.info(f"Push exitoso a {remote}/{branch}")
+        
+        return {
+            'status': 'success',
+            'remote': remote,
+            'branch': branch,
+            'push_time': self.last_push_time.isoformat()
+        }
+
     async def pull_from_remote(self, 
                               remote: str = 'origin',
                               branch: Optional[str] = None) -> Dict[str, any]:
@@ -447,7 +944,7 @@ repleto_temp/
             
             # Generar nombre automático si no se proporciona
             if experiment_name is None:
-                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+                timestamp = time.strftime("%Y%m%d-%H%M%S")
                 experiment_name = f"experiment-{timestamp}"
             
             branch_name = f"{self.branch_prefix}-{experiment_name}"
@@ -534,16 +1031,23 @@ repleto_temp/
                 return {'status': 'already_running', 'message': 'Auto-sync ya está activo'}
             
             self.auto_sync_enabled = True
+            self._stop_event = asyncio.Event()
             
             # Iniciar tareas en background
+            if self.watch_changes and WATCHFILES_AVAILABLE:
+                self._watcher_active = True
+                asyncio.create_task(self._watch_task())
+            elif self.watch_changes:
+                logger.info("watchfiles no disponible, usando solo auto-commit periódico")
+            self._last_push_monotonic = time.monotonic()
             asyncio.create_task(self._auto_commit_task())
-            asyncio.create_task(self._auto_push_task())
             
             logger.info("Auto-sync iniciado")
             
             return {
                 'status': 'started',
                 'commit_interval': self.auto_commit_interval,
+                'watching': self._watcher_active,
                 'push_interval': self.auto_push_interval
             }
             
@@ -559,96 +1063,129 @@ repleto_temp/
             Estado de parada
         """
         self.auto_sync_enabled = False
+        if self._stop_event is not None:
+            self._stop_event.set()
         logger.info("Auto-sync detenido")
         
         return {'status': 'stopped'}
 
-    async def _auto_commit_task(self):
-        """Tarea de auto-commit en background"""
-        while self.auto_sync_enabled:
-            try:
-                await asyncio.sleep(self.auto_commit_interval)
+    async def _watch_task(self):
+        """Tarea de auto-commit disparada por eventos del sistema de archivos"""
+        try:
+            watch_filter = DefaultFilter(ignore_paths=[self.git_dir])
+            async for _changes in awatch(self.repo_path,
+                                         watch_filter=watch_filter,
+                                         stop_event=self._stop_event):
+                # Agrupar ráfagas de cambios (ej. un editor guardando varios archivos)
+                await asyncio.sleep(self.watch_debounce)
                 
                 if not self.auto_sync_enabled:
                     break
                 
-                # Verificar si hay cambios
-                status = await self.get_repo_status()
-                if status['status'] == 'ok':
-                    has_changes = (status['modified_files'] or 
-                                 status['untracked_files'])
-                    
-                    if has_changes:
-                        result = await self.stage_and_commit()
-                        if result['status'] == 'success':
-                            logger.info(f"Auto-commit exitoso: {result['commit_hash'][:8]}")
-                        else:
-                            logger.warning(f"Auto-commit falló: {result.get('message')}")
+                result = await self.stage_and_commit()
+                if result['status'] == 'success':
+                    logger.info(f"Auto-commit exitoso: {result['commit_hash'][:8]}")
+                elif result['status'] != 'no_changes':
+                    logger.warning(f"Auto-commit falló: {result.get('message')}")
                 
-            except Exception as e:
-                logger.error(f"Error en auto-commit task: {e}")
+        except Exception as e:
+            logger.error(f"Error en watch task: {e}")
+        finally:
+            self._watcher_active = False
 
-    async def _auto_push_task(self):
-        """Tarea de auto-push en background"""
+    async def _auto_commit_task(self):
+        """Tarea de auto-sync en background: auto-commit y auto-push"""
         while self.auto_sync_enabled:
             try:
-                await asyncio.sleep(self.auto_push_interval)
+                if self._watcher_active:
+                    # El watcher ya hace los commits; despertar solo como respaldo
+                    # y para respetar el intervalo de push
+                    interval = min(max(self.auto_commit_interval, _WATCH_FALLBACK_INTERVAL),
+                                   self.auto_push_interval)
+                else:
+                    interval = self.auto_commit_interval
+                await asyncio.sleep(interval)
                 
                 if not self.auto_sync_enabled:
                     break
                 
-                # Solo push si hay commits locales pendientes
-                success, output = await self._run_git_command(['status', '--ahead-behind'])
-                if success and 'ahead' in output:
-                    result = await self.push_to_remote()
+                # Una sola consulta de estado para commit y push
+                status = await self.get_repo_status()
+                if status['status'] != 'ok':
+                    continue
+                
+                ahead = status['ahead']
+                if status['has_changes']:
+                    result = await self.stage_and_commit(status=status)
+                    if result['status'] == 'success':
+                        logger.info(f"Auto-commit exitoso: {result['commit_hash'][:8]}")
+                        ahead += 1
+                    elif result['status'] != 'no_changes':
+                        logger.warning(f"Auto-commit falló: {result.get('message')}")
+                
+                # Solo push si hay commits locales pendientes y ya pasó el intervalo
+                elapsed_since_last_push = time.monotonic() - self._last_push_monotonic
+                if ahead > 0 and elapsed_since_last_push >= self.auto_push_interval:
+                    result = await self._push_branch('origin', status['current_branch'])
                     if result['status'] == 'success':
                         logger.info("Auto-push exitoso")
                     else:
                         logger.warning(f"Auto-push falló: {result.get('message')}")
                 
             except Exception as e:
-                logger.error(f"Error en auto-push task: {e}")
+                logger.error(f"Error en auto-sync task: {e}")
 
-    async def get_commit_history(self, limit: int = 10) -> List[Dict[str, any]]:
+    async def get_commit_history(self, limit: int = 10) -> AsyncIterator[CommitRecord]:
         """
         Obtener historial de commits
         
+        Los commits se emiten a medida que git los produce, así que el
+        consumidor puede cortar la iteración en cualquier momento. El
+        resultado completo se cachea por límite junto al hash de HEAD: el
+        historial no cambia mientras HEAD no cambie.
+        
         Args:
             limit: Número máximo de commits
             
-        Returns:
-            Lista de commits
+        Yields:
+            Commits (mapeos con hash, author_name, author_email, date y message)
         """
         try:
             if not self._is_git_repo():
-                return []
+                return
             
-            # Obtener commits con formato personalizado
-            success, output = await self._run_git_command([
+            try:
+                head_sha = self._current_head_sha()
+            except OSError:
+                # HEAD ilegible: git log igualmente, pero sin clave de caché
+                head_sha = None
+            cached = self._history_cache.get(limit)
+            if head_sha is not None and cached is not None and cached[0] == head_sha:
+                for commit in cached[1]:
+                    yield commit
+                return
+            
+            # Un commit por línea, con los campos separados por NUL
+            commits = []
+            # aclosing: si el consumidor corta, el proceso y su plaza del semáforo
+            # se liberan aquí y no cuando el recolector finalice el generador
+            async with aclosing(self._run_git_command_stream([
                 'log', 
                 f'--max-count={limit}',
-                '--pretty=format:%H|%an|%ae|%ad|%s',
+                _COMMIT_LOG_FORMAT,
                 '--date=iso'
-            ])
-            
-            if not success:
-                return []
-            
-            commits = []
-            for line in output.split('\n'):
-                if line.strip():
-                    parts = line.split('|')
-                    if len(parts) >= 5:
-                        commits.append({
-                            'hash': parts[0],
-                            'author_name': parts[1],
-                            'author_email': parts[2],
-                            'date': parts[3],
-                            'message': '|'.join(parts[4:])  # En caso de que el mensaje tenga |
-                        })
-            
-            return commits
+            ], read_only=True)) as lines:
+                async for line in lines:
+                    fields = line.rstrip(b'\n').split(b'\0')
+                    if len(fields) == len(_COMMIT_FIELDS):
+                        commit = CommitRecord(fields)
+                        commits.append(commit)
+                        yield commit
+            
+            # Solo se cachea si el consumidor recorrió el historial completo
+            # y git log terminó bien (si no, el stream lanza GitError)
+            if head_sha is not None:
+                self._history_cache[limit] = (head_sha, commits)
             
         except Exception as e:
             logger.error(f"Error obteniendo historial: {e}")
-            return []
\ No newline at end of file
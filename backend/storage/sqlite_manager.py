@@ -12,15 +12,236 @@ Sistema de almacenamiento persistente usando SQLite para:
 import sqlite3
 import logging
 import json
+import os
+import time
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Dict, Final, List, Any, Optional, Tuple
+from datetime import datetime
 from pathlib import Path
 import aiosqlite
 import hashlib
+from functools import lru_cache
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# PRAGMAs por conexión (journal_mode=WAL es persistente y se fija una vez
+# en initialize_database)
+_CONNECTION_PRAGMAS = """
+    PRAGMA foreign_keys = ON;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA busy_timeout = 5000;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA recursive_triggers = ON;
+    PRAGMA journal_size_limit = 67108864;
+"""
+
+# Tablas cuyo número de filas se mantiene en stats_rollup mediante triggers
+# (recursive_triggers hace que un posible INSERT OR REPLACE dispare también
+# el DELETE)
+_ROLLUP_TABLES: Final[Tuple[str, ...]] = (
+    'code_executions', 'code_snippets', 'user_settings',
+    'user_sessions', 'metrics', 'cache_entries', 'file_tracking'
+)
+
+# Claves de los resultados, en el mismo orden que las columnas del SELECT
+_HISTORY_KEYS: Final[Tuple[str, ...]] = (
+    'id', 'session_id', 'code_hash', 'language', 'code', 'output', 'error',
+    'execution_time_ms', 'memory_used_mb', 'exit_code', 'created_at'
+)
+_SNIPPET_KEYS: Final[Tuple[str, ...]] = (
+    'id', 'title', 'description', 'language', 'code', 'tags',
+    'is_favorite', 'usage_count', 'created_at', 'updated_at'
+)
+_METRIC_KEYS: Final[Tuple[str, ...]] = (
+    'metric_name', 'metric_value', 'metric_unit', 'recorded_at'
+)
+
+# Tamaño total de código a partir del cual el hash se calcula en un hilo
+_HASH_OFFLOAD_BYTES = 64 * 1024
+
+# Filas por lectura en consultas que pueden devolver muchos resultados
+_FETCH_CHUNK = 1000
+
+# Tamaño de la caché de sentencias preparadas de cada conexión
+_CACHED_STATEMENTS = 256
+
+# SQL de los métodos frecuentes: el texto idéntico reutiliza la sentencia
+# ya compilada de la caché de sqlite3 en lugar de volver a parsearla
+_SQL_INSERT_CODE_BLOB: Final[str] = """
+    INSERT OR IGNORE INTO code_blobs (code_hash, code) VALUES (?, ?)
+"""
+_SQL_INSERT_EXEC_PREFIX: Final[str] = """
+    INSERT INTO code_executions 
+    (session_id, code_hash, language, output, error, 
+     execution_time_ms, memory_used_mb, exit_code, metadata)
+    VALUES """
+# Filas por INSERT multi-fila (9 parámetros/fila, por debajo del límite
+# histórico de 999 variables de SQLite)
+_INSERT_EXEC_CHUNK = 100
+_SQL_INSERT_SNIPPET: Final[str] = """
+    INSERT INTO code_snippets 
+    (title, description, language, code, tags)
+    VALUES (?, ?, ?, ?, ?)
+    RETURNING id
+"""
+_SQL_INCREMENT_SNIPPET: Final[str] = """
+    UPDATE code_snippets 
+    SET usage_count = usage_count + ?,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+# Upserts: ON CONFLICT DO UPDATE reescribe la fila en su sitio en lugar
+# del DELETE + INSERT de INSERT OR REPLACE
+_SQL_SAVE_SETTING: Final[str] = """
+    INSERT INTO user_settings (key, value, category)
+    VALUES (?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET
+        value = excluded.value,
+        category = excluded.category,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_GET_SETTING: Final[str] = "SELECT value FROM user_settings WHERE key = ?"
+_SQL_CREATE_SESSION: Final[str] = """
+    INSERT INTO user_sessions 
+    (session_id, user_agent, ip_address, metadata)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        user_agent = excluded.user_agent,
+        ip_address = excluded.ip_address,
+        metadata = excluded.metadata,
+        is_active = TRUE,
+        last_activity = CURRENT_TIMESTAMP
+"""
+_SQL_SESSION_ACTIVITY: Final[str] = """
+    UPDATE user_sessions 
+    SET last_activity = datetime(?, 'unixepoch')
+    WHERE session_id = ?
+"""
+_SQL_INSERT_METRIC: Final[str] = """
+    INSERT INTO metrics (metric_name, metric_value, metric_unit, tags)
+    VALUES (?, ?, ?, ?)
+"""
+# Epoch actual calculado por SQLite (expires_at se guarda en epoch)
+_SQL_NOW_EPOCH: Final[str] = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+_SQL_CACHE_SET: Final[str] = f"""
+    INSERT INTO cache_entries 
+    (cache_key, cache_value, expires_at)
+    VALUES (?, ?, {_SQL_NOW_EPOCH} + ?)
+    ON CONFLICT(cache_key) DO UPDATE SET
+        cache_value = excluded.cache_value,
+        expires_at = excluded.expires_at,
+        created_at = CURRENT_TIMESTAMP,
+        access_count = 0,
+        last_accessed = CURRENT_TIMESTAMP
+"""
+# Lectura + contador de acceso en una sola sentencia
+_SQL_CACHE_GET: Final[str] = f"""
+    UPDATE cache_entries 
+    SET access_count = access_count + 1,
+        last_accessed = CURRENT_TIMESTAMP
+    WHERE cache_key = ? AND (expires_at IS NULL OR expires_at > {_SQL_NOW_EPOCH})
+    RETURNING cache_value
+"""
+_SQL_CACHE_GET_FIELD: Final[str] = f"""
+    SELECT cache_value ->> ?
+    FROM cache_entries 
+    WHERE cache_key = ? AND (expires_at IS NULL OR expires_at > {_SQL_NOW_EPOCH})
+"""
+_SQL_CACHE_CLEANUP: Final[str] = f"""
+    DELETE FROM cache_entries 
+    WHERE expires_at IS NOT NULL 
+    AND expires_at <= {_SQL_NOW_EPOCH}
+"""
+
+# Cada cuántas inserciones en cache se purgan las entradas expiradas
+_CACHE_PRUNE_EVERY = 1000
+
+
+def _encode(value: Any) -> str:
+    """
+    Serializar a JSON para las columnas metadata/tags/value/cache_value
+    
+    Se guarda como TEXT (no BLOB) para que json_each y ->> sigan funcionando.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            # Claves no str (int, float, bool, None) como las convierte json.dumps
+            return orjson.dumps(
+                value, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            # Lo que orjson no admite (enteros de más de 64 bits, ...) va por json
+            pass
+    return json.dumps(value)
+
+
+def _decode(data: str) -> Any:
+    """Deserializar JSON leído de la base de datos"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def _insert_exec_sql(rows: int) -> str:
+    """
+    INSERT multi-fila con RETURNING id para `rows` ejecuciones
+    
+    Se cachea para que cada tamaño de lote reutilice el mismo texto SQL
+    (y la sentencia preparada). executemany no devuelve filas de RETURNING.
+    """
+    values = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * rows)
+    return f"{_SQL_INSERT_EXEC_PREFIX}{values} RETURNING id"
+
+
+def _prepare_execution_rows(rows: List[tuple]) -> Tuple[Dict[bytes, str], List[tuple]]:
+    """
+    Calcular hashes y parámetros de INSERT para un lote de ejecuciones
+    
+    Returns:
+        (code_blobs por hash, parámetros de code_executions)
+    """
+    blobs = {}
+    params = []
+    for (session_id, code, language, output, error,
+         execution_time_ms, memory_used_mb, exit_code, metadata) in rows:
+        # Generar hash del código
+        code_hash = _code_digest(code.encode())
+        blobs[code_hash] = code
+        params.append((
+            session_id, code_hash, language, output, error,
+            execution_time_ms, memory_used_mb, exit_code,
+            _encode(metadata) if metadata else None
+        ))
+    return blobs, params
+
+
+def _code_digest(code_bytes: bytes) -> bytes:
+    """
+    Hash de 16 bytes del código para deduplicación/búsqueda
+    
+    Usa xxh3_128 si xxhash está instalado; si no, BLAKE2b truncado a 16 bytes.
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_digest(code_bytes)
+    return hashlib.blake2b(code_bytes, digest_size=16).digest()
+
 class SQLiteManager:
     """
     Gestor de base de datos SQLite para RepletO
@@ -40,6 +261,31 @@ class SQLiteManager:
         self.connection_timeout = 30.0
         self.isolation_level = None  # Autocommit mode
         
+        # Un único escritor (se abre en el primer uso) y un pool de lectores
+        # de solo lectura que WAL permite ejecutar en paralelo
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._conn_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self.reader_pool_size = os.cpu_count() or 4
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        
+        # Cola de escritura diferida: agrupa inserts en transacciones
+        self.write_batch_size = 500
+        self.write_batch_interval = 0.1  # segundos
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # Actualizaciones frecuentes acumuladas en memoria y volcadas en bloque
+        self.activity_flush_interval = 1.0  # segundos
+        self._session_activity: Dict[str, float] = {}
+        self._snippet_usage: Dict[int, int] = {}
+        self._activity_task: Optional[asyncio.Task] = None
+        
+        # Mantenimiento periódico (PRAGMA optimize + checkpoint del WAL)
+        self.maintenance_interval = 900  # segundos
+        self._maintenance_task: Optional[asyncio.Task] = None
+        
         logger.info(f"SQLiteManager inicializado con DB: {self.db_path}")
 
     async def initialize_database(self) -> Dict[str, Any]:
@@ -50,13 +296,10 @@ class SQLiteManager:
             Estado de inicialización
         """
         try:
-            async with aiosqlite.connect(
-                self.db_path, 
-                timeout=self.connection_timeout,
-                isolation_level=self.isolation_level
-            ) as db:
-                # Habilitar foreign keys
-                await db.execute("PRAGMA foreign_keys = ON")
+            db = await self._conn()
+            async with self._write_lock:
+                # WAL: lecturas concurrentes con escrituras y menos fsync por commit
+                await db.execute("PRAGMA journal_mode = WAL")
                 
                 # Crear tablas
                 await self._create_tables(db)
@@ -64,7 +307,20 @@ class SQLiteManager:
                 # Crear índices
                 await self._create_indexes(db)
                 
-                await db.commit()
+                # Abrir lectores (requiere que el archivo ya exista)
+                if self._readers is None:
+                    await self._open_readers()
+                
+                # Iniciar cola de escritura diferida
+                if self._writer_task is None:
+                    self._write_queue = asyncio.Queue()
+                    self._writer_task = asyncio.create_task(self._write_behind_loop())
+                
+                if self._activity_task is None:
+                    self._activity_task = asyncio.create_task(self._activity_flush_loop())
+                
+                if self._maintenance_task is None:
+                    self._maintenance_task = asyncio.create_task(self._maintenance_loop())
                 
                 logger.info("Base de datos inicializada exitosamente")
                 
@@ -83,6 +339,198 @@ class SQLiteManager:
                 'db_path': str(self.db_path)
             }
 
+    async def _conn(self) -> aiosqlite.Connection:
+        """
+        Obtener la conexión de escritura, abriéndola en el primer uso
+        
+        Mantener una sola conexión conserva la caché de páginas de SQLite y
+        evita crear un hilo de aiosqlite por cada operación. Las escrituras
+        deben hacerse bajo self._write_lock.
+        """
+        if self._writer is None:
+            async with self._conn_lock:
+                if self._writer is None:
+                    self._writer = await self._open_connection(self.db_path)
+        return self._writer
+
+    async def _open_connection(self, database: Any, **kwargs) -> aiosqlite.Connection:
+        """Abrir una conexión aiosqlite con los PRAGMAs por conexión"""
+        db = aiosqlite.connect(
+            database,
+            timeout=self.connection_timeout,
+            isolation_level=self.isolation_level,
+            cached_statements=_CACHED_STATEMENTS,
+            iter_chunk_size=_FETCH_CHUNK,  # filas por fetchmany al iterar un cursor
+            **kwargs
+        )
+        db.daemon = True  # No bloquear la salida si no se llama a close()
+        await db
+        await self._apply_pragmas(db)
+        return db
+
+    async def _open_readers(self):
+        """Abrir el pool de conexiones de solo lectura"""
+        uri = f"file:{self.db_path.resolve()}?mode=ro"
+        readers = asyncio.Queue(maxsize=self.reader_pool_size)
+        for _ in range(self.reader_pool_size):
+            db = await self._open_connection(uri, uri=True)
+            self._reader_conns.append(db)
+            readers.put_nowait(db)
+        self._readers = readers
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Prestar una conexión de solo lectura del pool
+        
+        Antes de initialize_database se usa la conexión de escritura.
+        """
+        readers = self._readers
+        if readers is None:
+            yield await self._conn()
+            return
+        
+        db = await readers.get()
+        try:
+            yield db
+        finally:
+            readers.put_nowait(db)
+
+    async def close(self):
+        """Vaciar la cola de escritura y cerrar la conexión compartida"""
+        if self._writer_task is not None:
+            await self._write_queue.join()
+            self._writer_task.cancel()
+            self._writer_task = None
+            self._write_queue = None
+        
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        
+        if self._activity_task is not None:
+            self._activity_task.cancel()
+            self._activity_task = None
+        await self._flush_activity()
+        
+        for db in self._reader_conns:
+            await db.close()
+        self._reader_conns = []
+        self._readers = None
+        
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    async def _apply_pragmas(self, db: aiosqlite.Connection):
+        """Aplicar los PRAGMAs por conexión"""
+        await db.executescript(_CONNECTION_PRAGMAS)
+
+    async def _write_behind_loop(self):
+        """
+        Tarea en background que vacía la cola de escritura
+        
+        Agrupa hasta write_batch_size elementos o write_batch_interval
+        segundos y los escribe con las APIs bulk (una transacción por lote).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + self.write_batch_interval
+            
+            while len(batch) < self.write_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._flush_writes(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    async def _flush_writes(self, batch: List[Tuple[str, tuple, Optional[asyncio.Future]]]):
+        """Escribir un lote de la cola y resolver los futures pendientes"""
+        metrics = [row for kind, row, _ in batch if kind == 'metric']
+        executions = [(row, future) for kind, row, future in batch if kind == 'execution']
+        
+        if metrics:
+            try:
+                await self.record_metrics_bulk(metrics)
+            except Exception as e:
+                logger.error(f"Error registrando lote de métricas: {e}")
+        
+        if executions:
+            try:
+                execution_ids = await self.save_code_executions_bulk([row for row, _ in executions])
+                for (_, future), execution_id in zip(executions, execution_ids):
+                    if not future.done():
+                        future.set_result(execution_id)
+            except Exception as e:
+                for _, future in executions:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _activity_flush_loop(self):
+        """Volcar periódicamente la actividad de sesiones y usos de snippets"""
+        while True:
+            await asyncio.sleep(self.activity_flush_interval)
+            await self._flush_activity()
+
+    async def _flush_activity(self):
+        """Escribir en una transacción las actualizaciones acumuladas"""
+        if not self._session_activity and not self._snippet_usage:
+            return
+        
+        sessions, self._session_activity = self._session_activity, {}
+        usage, self._snippet_usage = self._snippet_usage, {}
+        
+        try:
+            db = await self._conn()
+            async with self._write_lock:
+                await db.execute("BEGIN IMMEDIATE")
+                try:
+                    if sessions:
+                        await db.executemany(
+                            _SQL_SESSION_ACTIVITY,
+                            [(ts, sid) for sid, ts in sessions.items()]
+                        )
+                    if usage:
+                        await db.executemany(
+                            _SQL_INCREMENT_SNIPPET,
+                            [(count, sid) for sid, count in usage.items()]
+                        )
+                    await db.commit()
+                except BaseException:
+                    # También al cancelar (close() cancela el bucle): no dejar la
+                    # transacción abierta en la conexión compartida
+                    await db.rollback()
+                    raise
+                    
+        except Exception as e:
+            logger.error(f"Error volcando actividad acumulada: {e}")
+
+    async def _maintenance_loop(self):
+        """
+        Mantenimiento cada maintenance_interval segundos
+        
+        PRAGMA optimize mantiene al día las estadísticas del planificador y
+        el checkpoint TRUNCATE devuelve el WAL a tamaño cero.
+        """
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            try:
+                db = await self._conn()
+                async with self._write_lock:
+                    await db.execute("PRAGMA optimize")
+                    await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except Exception as e:
+                logger.error(f"Error en mantenimiento de base de datos: {e}")
+
     async def _create_tables(self, db: aiosqlite.Connection):
         """Crear todas las tablas necesarias"""
         
@@ -91,9 +539,8 @@ class SQLiteManager:
             CREATE TABLE IF NOT EXISTS code_executions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id TEXT NOT NULL,
-                code_hash TEXT NOT NULL,
+                code_hash BLOB NOT NULL,  -- referencia a code_blobs
                 language TEXT NOT NULL,
-                code TEXT NOT NULL,
                 output TEXT,
                 error TEXT,
                 execution_time_ms INTEGER,
@@ -104,6 +551,30 @@ class SQLiteManager:
             )
         """)
         
+        # Código deduplicado: cada texto distinto se guarda una sola vez
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS code_blobs (
+                code_hash BLOB PRIMARY KEY,  -- digest de 16 bytes
+                code TEXT NOT NULL,
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Migrar la columna code de versiones anteriores a code_blobs
+        cursor = await db.execute("SELECT 1 FROM pragma_table_info('code_executions') WHERE name = 'code'")
+        if await cursor.fetchone():
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.execute("""
+                    INSERT OR IGNORE INTO code_blobs (code_hash, code)
+                    SELECT code_hash, code FROM code_executions
+                """)
+                await db.execute("ALTER TABLE code_executions DROP COLUMN code")
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+        
         # Tabla de snippets de código
         await db.execute("""
             CREATE TABLE IF NOT EXISTS code_snippets (
@@ -120,6 +591,48 @@ class SQLiteManager:
             )
         """)
         
+        # Índice de texto completo de snippets (contenido externo: code_snippets)
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'code_snippets_fts'"
+        )
+        fts_exists = await cursor.fetchone() is not None
+        
+        await db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS code_snippets_fts USING fts5(
+                title, description, code,
+                content='code_snippets', content_rowid='id',
+                tokenize='unicode61'
+            )
+        """)
+        await db.executescript("""
+            CREATE TRIGGER IF NOT EXISTS trg_snippets_fts_ins
+            AFTER INSERT ON code_snippets
+            BEGIN
+                INSERT INTO code_snippets_fts (rowid, title, description, code)
+                VALUES (new.id, new.title, new.description, new.code);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_snippets_fts_del
+            AFTER DELETE ON code_snippets
+            BEGIN
+                INSERT INTO code_snippets_fts (code_snippets_fts, rowid, title, description, code)
+                VALUES ('delete', old.id, old.title, old.description, old.code);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_snippets_fts_upd
+            AFTER UPDATE OF title, description, code ON code_snippets
+            BEGIN
+                INSERT INTO code_snippets_fts (code_snippets_fts, rowid, title, description, code)
+                VALUES ('delete', old.id, old.title, old.description, old.code);
+                INSERT INTO code_snippets_fts (rowid, title, description, code)
+                VALUES (new.id, new.title, new.description, new.code);
+            END;
+        """)
+        
+        if not fts_exists:
+            # Indexar los snippets que existían antes del índice
+            await db.execute("INSERT INTO code_snippets_fts (code_snippets_fts) VALUES ('rebuild')")
+        
         # Tabla de configuraciones
         await db.execute("""
             CREATE TABLE IF NOT EXISTS user_settings (
@@ -161,13 +674,17 @@ class SQLiteManager:
             CREATE TABLE IF NOT EXISTS cache_entries (
                 cache_key TEXT PRIMARY KEY,
                 cache_value TEXT NOT NULL,  -- JSON
-                expires_at TIMESTAMP,
+                expires_at INTEGER,  -- epoch en segundos
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 access_count INTEGER DEFAULT 0,
                 last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         
+        # Entradas con expires_at ISO de versiones anteriores: el cache es
+        # desechable, así que se descartan en lugar de convertirlas
+        await db.execute("DELETE FROM cache_entries WHERE typeof(expires_at) = 'text'")
+        
         # Tabla de archivos (tracking)
         await db.execute("""
             CREATE TABLE IF NOT EXISTS file_tracking (
@@ -182,13 +699,57 @@ class SQLiteManager:
                 last_executed TIMESTAMP
             )
         """)
+        
+        # Conteos materializados para get_database_stats
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS stats_rollup (
+                table_name TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        for table in _ROLLUP_TABLES:
+            # Solo cuenta filas la primera vez; después lo mantienen los triggers
+            await db.execute(f"""
+                INSERT OR IGNORE INTO stats_rollup (table_name, row_count)
+                SELECT '{table}', COUNT(*) FROM {table}
+            """)
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_ins
+                AFTER INSERT ON {table}
+                BEGIN
+                    UPDATE stats_rollup SET row_count = row_count + 1
+                    WHERE table_name = '{table}';
+                END
+            """)
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_del
+                AFTER DELETE ON {table}
+                BEGIN
+                    UPDATE stats_rollup SET row_count = row_count - 1
+                    WHERE table_name = '{table}';
+                END
+            """)
+        
+        # Purga perezosa del cache: cada _CACHE_PRUNE_EVERY filas insertadas.
+        # El rowid crece con cada inserción, así que sirve de contador sin
+        # recorrer la tabla ni depender del orden de los triggers
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cache_prune
+            AFTER INSERT ON cache_entries
+            WHEN new.rowid % {_CACHE_PRUNE_EVERY} = 0
+            BEGIN
+                {_SQL_CACHE_CLEANUP.strip()};
+            END
+        """)
 
     async def _create_indexes(self, db: aiosqlite.Connection):
         """Crear índices para optimizar consultas"""
         
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_executions_session ON code_executions(session_id)",
-            "CREATE INDEX IF NOT EXISTS idx_executions_language ON code_executions(language)",
+            # Historial: filtro + ORDER BY created_at DESC recorriendo el índice
+            "CREATE INDEX IF NOT EXISTS idx_exec_session_created ON code_executions(session_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_exec_lang_created ON code_executions(language, created_at DESC)",
             "CREATE INDEX IF NOT EXISTS idx_executions_created ON code_executions(created_at)",
             "CREATE INDEX IF NOT EXISTS idx_executions_hash ON code_executions(code_hash)",
             
@@ -211,6 +772,13 @@ class SQLiteManager:
         
         for index_sql in indexes:
             await db.execute(index_sql)
+        
+        # Redundantes: son prefijo de los índices compuestos
+        await db.execute("DROP INDEX IF EXISTS idx_executions_session")
+        await db.execute("DROP INDEX IF EXISTS idx_executions_language")
+        
+        # Estadísticas para el planificador de consultas
+        await db.execute("ANALYZE")
 
     async def save_code_execution(self,
                                  session_id: str,
@@ -239,40 +807,72 @@ class SQLiteManager:
         Returns:
             ID de la ejecución guardada
         """
+        row = (session_id, code, language, output, error,
+               execution_time_ms, memory_used_mb, exit_code, metadata)
+        
         try:
-            # Generar hash del código
-            code_hash = hashlib.sha256(code.encode()).hexdigest()[:16]
+            if self._write_queue is None:
+                execution_id = (await self.save_code_executions_bulk([row]))[0]
+            else:
+                # Se encola y se espera al ID asignado por el lote
+                future = asyncio.get_running_loop().create_future()
+                self._write_queue.put_nowait(('execution', row, future))
+                execution_id = await future
             
-            async with aiosqlite.connect(
-                self.db_path, 
-                timeout=self.connection_timeout
-            ) as db:
-                cursor = await db.execute("""
-                    INSERT INTO code_executions 
-                    (session_id, code_hash, language, code, output, error, 
-                     execution_time_ms, memory_used_mb, exit_code, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    session_id, code_hash, language, code, output, error,
-                    execution_time_ms, memory_used_mb, exit_code,
-                    json.dumps(metadata) if metadata else None
-                ))
-                
-                await db.commit()
-                execution_id = cursor.lastrowid
-                
-                logger.debug(f"Ejecución guardada con ID: {execution_id}")
-                return execution_id
+            logger.debug(f"Ejecución guardada con ID: {execution_id}")
+            return execution_id
                 
         except Exception as e:
             logger.error(f"Error guardando ejecución: {e}")
             raise
 
+    async def save_code_executions_bulk(self, rows: List[tuple]) -> List[int]:
+        """
+        Guardar varias ejecuciones en una sola transacción
+        
+        Args:
+            rows: Tuplas (session_id, code, language, output, error,
+                execution_time_ms, memory_used_mb, exit_code, metadata)
+            
+        Returns:
+            IDs asignados, en el mismo orden que rows
+        """
+        # Con mucho código, hashear/serializar en un hilo para no bloquear el loop
+        if sum(len(row[1]) for row in rows) > _HASH_OFFLOAD_BYTES:
+            blobs, params = await asyncio.to_thread(_prepare_execution_rows, rows)
+        else:
+            blobs, params = _prepare_execution_rows(rows)
+        
+        db = await self._conn()
+        async with self._write_lock:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.executemany(_SQL_INSERT_CODE_BLOB, blobs.items())
+                
+                execution_ids = []
+                for start in range(0, len(params), _INSERT_EXEC_CHUNK):
+                    chunk = params[start:start + _INSERT_EXEC_CHUNK]
+                    returned = await db.execute_fetchall(
+                        _insert_exec_sql(len(chunk)),
+                        [value for row in chunk for value in row]
+                    )
+                    # RETURNING no garantiza orden; AUTOINCREMENT asigna IDs
+                    # crecientes en el orden de VALUES
+                    execution_ids.extend(sorted(row[0] for row in returned))
+                
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+        
+        return execution_ids
+
     async def get_execution_history(self,
                                    session_id: Optional[str] = None,
                                    language: Optional[str] = None,
                                    limit: int = 100,
-                                   offset: int = 0) -> List[Dict[str, Any]]:
+                                   offset: int = 0,
+                                   include_metadata: bool = False) -> List[Dict[str, Any]]:
         """
         Obtener historial de ejecuciones
         
@@ -281,48 +881,78 @@ class SQLiteManager:
             language: Filtrar por lenguaje
             limit: Límite de resultados
             offset: Offset para paginación
+            include_metadata: Incluir y decodificar la columna metadata
             
         Returns:
             Lista de ejecuciones
         """
         try:
-            query = """
-                SELECT id, session_id, code_hash, language, code, output, error,
-                       execution_time_ms, memory_used_mb, exit_code, created_at, metadata
-                FROM code_executions
-                WHERE 1=1
-            """
-            params = []
-            
-            if session_id:
-                query += " AND session_id = ?"
-                params.append(session_id)
-            
-            if language:
-                query += " AND language = ?"
-                params.append(language)
-            
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(query, params)
-                rows = await cursor.fetchall()
-                
-                executions = []
-                for row in rows:
-                    execution = dict(row)
-                    if execution['metadata']:
-                        execution['metadata'] = json.loads(execution['metadata'])
-                    executions.append(execution)
-                
-                return executions
+            async with aclosing(self.iter_execution_history(
+                session_id, language, limit, offset, include_metadata
+            )) as executions:
+                return [execution async for execution in executions]
                 
         except Exception as e:
             logger.error(f"Error obteniendo historial: {e}")
             return []
 
+    async def iter_execution_history(self,
+                                     session_id: Optional[str] = None,
+                                     language: Optional[str] = None,
+                                     limit: int = 100,
+                                     offset: int = 0,
+                                     include_metadata: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recorrer el historial de ejecuciones fila a fila
+        
+        Mismos argumentos que get_execution_history. Mantiene ocupada una
+        conexión de lectura hasta que el generador termina o se cierra: si se
+        corta la iteración antes, usar contextlib.aclosing (o llamar a aclose())
+        para devolverla al pool.
+        """
+        columns = """e.id, e.session_id, e.code_hash, e.language, b.code, e.output, e.error,
+                   e.execution_time_ms, e.memory_used_mb, e.exit_code, e.created_at"""
+        if include_metadata:
+            columns += ", e.metadata"
+        
+        query = f"""
+            SELECT {columns}
+            FROM code_executions e
+            JOIN code_blobs b ON b.code_hash = e.code_hash
+            WHERE 1=1
+        """
+        params = []
+        
+        if session_id:
+            query += " AND e.session_id = ?"
+            params.append(session_id)
+        
+        if language:
+            query += " AND e.language = ?"
+            params.append(language)
+        
+        query += " ORDER BY e.created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        keys = _HISTORY_KEYS + ('metadata',) if include_metadata else _HISTORY_KEYS
+        
+        async with self._reader() as db:
+            cursor = await db.execute(query, params)
+            async for row in cursor:
+                yield self._row_to_execution(row, keys)
+
+    @staticmethod
+    def _row_to_execution(row: tuple, keys: Tuple[str, ...]) -> Dict[str, Any]:
+        """Convertir una fila de code_executions en dict"""
+        execution = dict(zip(keys, row))
+        # El hash se guarda como BLOB; se expone en hex (serializable)
+        code_hash = row[2]
+        if isinstance(code_hash, bytes):
+            execution['code_hash'] = code_hash.hex()
+        if len(row) > 11 and row[11]:
+            execution['metadata'] = _decode(row[11])
+        return execution
+
     async def save_code_snippet(self,
                                title: str,
                                code: str,
@@ -343,18 +973,14 @@ class SQLiteManager:
             ID del snippet guardado
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    INSERT INTO code_snippets 
-                    (title, description, language, code, tags)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
+            db = await self._conn()
+            async with self._write_lock:
+                rows = await db.execute_fetchall(_SQL_INSERT_SNIPPET, (
                     title, description, language, code,
-                    json.dumps(tags) if tags else None
+                    _encode(tags) if tags else None
                 ))
                 
-                await db.commit()
-                snippet_id = cursor.lastrowid
+                snippet_id = rows[0][0]
                 
                 logger.debug(f"Snippet guardado con ID: {snippet_id}")
                 return snippet_id
@@ -367,81 +993,100 @@ class SQLiteManager:
                              query: Optional[str] = None,
                              language: Optional[str] = None,
                              tags: Optional[List[str]] = None,
-                             favorites_only: bool = False) -> List[Dict[str, Any]]:
+                             favorites_only: bool = False,
+                             fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
         """
         Buscar snippets de código
         
         Args:
-            query: Texto a buscar en título/descripción
+            query: Texto a buscar en título/descripción/código (por prefijo)
             language: Filtrar por lenguaje
             tags: Filtrar por tags
             favorites_only: Solo favoritos
+            fields: Columnas a devolver (por defecto todas); pedir solo
+                ('id', 'title') evita transferir el código
             
         Returns:
             Lista de snippets encontrados
         """
+        keys = tuple(fields) if fields else _SNIPPET_KEYS
+        unknown = set(keys) - set(_SNIPPET_KEYS)
+        if unknown:
+            raise ValueError(f"Campos de snippet desconocidos: {sorted(unknown)}")
+        
         try:
-            sql = """
-                SELECT id, title, description, language, code, tags, 
-                       is_favorite, usage_count, created_at, updated_at
-                FROM code_snippets
-                WHERE 1=1
+            columns = ", ".join(f"s.{key}" for key in keys)
+            sql = f"""
+                SELECT {columns}
+                FROM code_snippets s
             """
             params = []
             
-            if query:
-                sql += " AND (title LIKE ? OR description LIKE ? OR code LIKE ?)"
-                search_term = f"%{query}%"
-                params.extend([search_term, search_term, search_term])
+            match = self._fts_query(query) if query else None
+            if match:
+                sql += """
+                JOIN code_snippets_fts f ON f.rowid = s.id
+                WHERE code_snippets_fts MATCH ?
+                """
+                params.append(match)
+            else:
+                sql += " WHERE 1=1"
             
             if language:
-                sql += " AND language = ?"
+                sql += " AND s.language = ?"
                 params.append(language)
             
             if favorites_only:
-                sql += " AND is_favorite = TRUE"
+                sql += " AND s.is_favorite = TRUE"
+            
+            if tags:
+                placeholders = ", ".join("?" * len(tags))
+                sql += f"""
+                AND EXISTS (
+                    SELECT 1 FROM json_each(s.tags) WHERE json_each.value IN ({placeholders})
+                )
+                """
+                params.extend(tags)
             
-            sql += " ORDER BY usage_count DESC, updated_at DESC"
+            sql += " ORDER BY s.usage_count DESC, s.updated_at DESC"
             
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self._reader() as db:
                 cursor = await db.execute(sql, params)
                 rows = await cursor.fetchall()
                 
-                snippets = []
-                for row in rows:
-                    snippet = dict(row)
+            snippets = [dict(zip(keys, row)) for row in rows]
+            if 'tags' in keys:
+                for snippet in snippets:
                     if snippet['tags']:
-                        snippet['tags'] = json.loads(snippet['tags'])
-                    
-                    # Filtrar por tags si se especifica
-                    if tags:
-                        snippet_tags = snippet.get('tags', [])
-                        if not any(tag in snippet_tags for tag in tags):
-                            continue
-                    
-                    snippets.append(snippet)
+                        snippet['tags'] = _decode(snippet['tags'])
                 
-                return snippets
+            return snippets
                 
         except Exception as e:
             logger.error(f"Error buscando snippets: {e}")
             return []
 
+    @staticmethod
+    def _fts_query(query: str) -> Optional[str]:
+        """
+        Convertir texto libre en una expresión MATCH de FTS5
+        
+        Cada palabra se entrecomilla (para que la sintaxis de FTS5 en la
+        entrada del usuario no provoque errores) y se busca por prefijo.
+        """
+        terms = ['"' + term.replace('"', '""') + '"*' for term in query.split()]
+        return " ".join(terms) or None
+
     async def increment_snippet_usage(self, snippet_id: int):
-        """Incrementar contador de uso de snippet"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE code_snippets 
-                    SET usage_count = usage_count + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (snippet_id,))
-                await db.commit()
-                
-        except Exception as e:
-            logger.error(f"Error incrementando uso de snippet: {e}")
+        """
+        Incrementar contador de uso de snippet
+        
+        El incremento se acumula en memoria y se escribe en el siguiente
+        volcado (como mucho activity_flush_interval segundos después).
+        """
+        self._snippet_usage[snippet_id] = self._snippet_usage.get(snippet_id, 0) + 1
+        if self._activity_task is None:
+            await self._flush_activity()
 
     async def save_setting(self, key: str, value: Any, category: Optional[str] = None):
         """
@@ -453,12 +1098,9 @@ class SQLiteManager:
             category: Categoría de la configuración
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO user_settings (key, value, category)
-                    VALUES (?, ?, ?)
-                """, (key, json.dumps(value), category))
-                await db.commit()
+            db = await self._conn()
+            async with self._write_lock:
+                await db.execute(_SQL_SAVE_SETTING, (key, _encode(value), category))
                 
         except Exception as e:
             logger.error(f"Error guardando configuración: {e}")
@@ -476,16 +1118,13 @@ class SQLiteManager:
             Valor de configuración
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute(
-                    "SELECT value FROM user_settings WHERE key = ?", 
-                    (key,)
-                )
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_GET_SETTING, (key,))
                 row = await cursor.fetchone()
                 
-                if row:
-                    return json.loads(row[0])
-                return default
+            if row:
+                return _decode(row[0])
+            return default
                 
         except Exception as e:
             logger.error(f"Error obteniendo configuración: {e}")
@@ -506,34 +1145,27 @@ class SQLiteManager:
             metadata: Metadatos adicionales
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO user_sessions 
-                    (session_id, user_agent, ip_address, metadata)
-                    VALUES (?, ?, ?, ?)
-                """, (
+            db = await self._conn()
+            async with self._write_lock:
+                await db.execute(_SQL_CREATE_SESSION, (
                     session_id, user_agent, ip_address,
-                    json.dumps(metadata) if metadata else None
+                    _encode(metadata) if metadata else None
                 ))
-                await db.commit()
                 
         except Exception as e:
             logger.error(f"Error creando sesión: {e}")
             raise
 
     async def update_session_activity(self, session_id: str):
-        """Actualizar actividad de sesión"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE user_sessions 
-                    SET last_activity = CURRENT_TIMESTAMP
-                    WHERE session_id = ?
-                """, (session_id,))
-                await db.commit()
-                
-        except Exception as e:
-            logger.error(f"Error actualizando actividad de sesión: {e}")
+        """
+        Actualizar actividad de sesión
+        
+        Solo registra la marca de tiempo en memoria; varias llamadas dentro
+        del mismo intervalo se escriben como una sola actualización.
+        """
+        self._session_activity[session_id] = time.time()
+        if self._activity_task is None:
+            await self._flush_activity()
 
     async def record_metric(self,
                            metric_name: str,
@@ -549,24 +1181,44 @@ class SQLiteManager:
             unit: Unidad de medida
             tags: Tags adicionales
         """
+        row = (metric_name, value, unit, tags)
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO metrics (metric_name, metric_value, metric_unit, tags)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    metric_name, value, unit,
-                    json.dumps(tags) if tags else None
-                ))
-                await db.commit()
+            if self._write_queue is None:
+                await self.record_metrics_bulk([row])
+            else:
+                self._write_queue.put_nowait(('metric', row, None))
                 
         except Exception as e:
             logger.error(f"Error registrando métrica: {e}")
 
+    async def record_metrics_bulk(self, rows: List[tuple]):
+        """
+        Registrar varias métricas en una sola transacción
+        
+        Args:
+            rows: Tuplas (metric_name, value, unit, tags)
+        """
+        params = [
+            (metric_name, value, unit, _encode(tags) if tags else None)
+            for metric_name, value, unit, tags in rows
+        ]
+        
+        db = await self._conn()
+        async with self._write_lock:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.executemany(_SQL_INSERT_METRIC, params)
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+
     async def get_metrics(self,
                          metric_name: Optional[str] = None,
                          since: Optional[datetime] = None,
-                         limit: int = 1000) -> List[Dict[str, Any]]:
+                         limit: int = 1000,
+                         include_tags: bool = False) -> List[Dict[str, Any]]:
         """
         Obtener métricas
         
@@ -574,47 +1226,66 @@ class SQLiteManager:
             metric_name: Filtrar por nombre de métrica
             since: Filtrar desde fecha
             limit: Límite de resultados
+            include_tags: Incluir y decodificar la columna tags
             
         Returns:
             Lista de métricas
         """
         try:
-            query = """
-                SELECT metric_name, metric_value, metric_unit, tags, recorded_at
-                FROM metrics
-                WHERE 1=1
-            """
-            params = []
-            
-            if metric_name:
-                query += " AND metric_name = ?"
-                params.append(metric_name)
-            
-            if since:
-                query += " AND recorded_at >= ?"
-                params.append(since.isoformat())
-            
-            query += " ORDER BY recorded_at DESC LIMIT ?"
-            params.append(limit)
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(query, params)
-                rows = await cursor.fetchall()
-                
-                metrics = []
-                for row in rows:
-                    metric = dict(row)
-                    if metric['tags']:
-                        metric['tags'] = json.loads(metric['tags'])
-                    metrics.append(metric)
-                
-                return metrics
+            async with aclosing(self.iter_metrics(
+                metric_name, since, limit, include_tags
+            )) as metrics:
+                return [metric async for metric in metrics]
                 
         except Exception as e:
             logger.error(f"Error obteniendo métricas: {e}")
             return []
 
+    async def iter_metrics(self,
+                           metric_name: Optional[str] = None,
+                           since: Optional[datetime] = None,
+                           limit: int = 1000,
+                           include_tags: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recorrer métricas fila a fila
+        
+        Mismos argumentos que get_metrics. Mantiene ocupada una conexión
+        de lectura hasta que el generador termina o se cierra: si se corta la
+        iteración antes, usar contextlib.aclosing (o llamar a aclose()) para
+        devolverla al pool.
+        """
+        columns = "metric_name, metric_value, metric_unit, recorded_at"
+        if include_tags:
+            columns += ", tags"
+        
+        query = f"""
+            SELECT {columns}
+            FROM metrics
+            WHERE 1=1
+        """
+        params = []
+        
+        if metric_name:
+            query += " AND metric_name = ?"
+            params.append(metric_name)
+        
+        if since:
+            query += " AND recorded_at >= ?"
+            params.append(since.isoformat())
+        
+        query += " ORDER BY recorded_at DESC LIMIT ?"
+        params.append(limit)
+        
+        keys = _METRIC_KEYS + ('tags',) if include_tags else _METRIC_KEYS
+        
+        async with self._reader() as db:
+            cursor = await db.execute(query, params)
+            async for row in cursor:
+                metric = dict(zip(keys, row))
+                if include_tags and row[4]:
+                    metric['tags'] = _decode(row[4])
+                yield metric
+
     async def cache_set(self,
                        key: str,
                        value: Any,
@@ -628,17 +1299,11 @@ class SQLiteManager:
             expires_in_seconds: Tiempo de expiración en segundos
         """
         try:
-            expires_at = None
-            if expires_in_seconds:
-                expires_at = (datetime.now() + timedelta(seconds=expires_in_seconds)).isoformat()
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO cache_entries 
-                    (cache_key, cache_value, expires_at)
-                    VALUES (?, ?, ?)
-                """, (key, json.dumps(value), expires_at))
-                await db.commit()
+            db = await self._conn()
+            async with self._write_lock:
+                await db.execute(
+                    _SQL_CACHE_SET, (key, _encode(value), expires_in_seconds or None)
+                )
                 
         except Exception as e:
             logger.error(f"Error guardando en cache: {e}")
@@ -654,56 +1319,48 @@ class SQLiteManager:
             Valor cacheado o None si no existe/expiró
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    SELECT cache_value, expires_at 
-                    FROM cache_entries 
-                    WHERE cache_key = ?
-                """, (key,))
-                row = await cursor.fetchone()
-                
-                if not row:
-                    return None
-                
-                cache_value, expires_at = row
-                
-                # Verificar expiración
-                if expires_at:
-                    expires_datetime = datetime.fromisoformat(expires_at)
-                    if datetime.now() > expires_datetime:
-                        # Entrada expirada, eliminarla
-                        await db.execute(
-                            "DELETE FROM cache_entries WHERE cache_key = ?", 
-                            (key,)
-                        )
-                        await db.commit()
-                        return None
-                
-                # Actualizar contador de acceso
-                await db.execute("""
-                    UPDATE cache_entries 
-                    SET access_count = access_count + 1,
-                        last_accessed = CURRENT_TIMESTAMP
-                    WHERE cache_key = ?
-                """, (key,))
-                await db.commit()
-                
-                return json.loads(cache_value)
+            db = await self._conn()
+            async with self._write_lock:
+                # Sin filas: no existe o expiró (lo borra cleanup_expired_cache)
+                rows = await db.execute_fetchall(_SQL_CACHE_GET, (key,))
+            
+            if not rows:
+                return None
+            
+            return _decode(rows[0][0])
                 
         except Exception as e:
             logger.error(f"Error obteniendo del cache: {e}")
             return None
 
+    async def cache_get_field(self, key: str, path: str) -> Optional[Any]:
+        """
+        Obtener un campo de un valor cacheado sin decodificarlo entero
+        
+        Args:
+            key: Clave de cache
+            path: Ruta JSON del campo (ej. '$.status' o '$.items[0]')
+            
+        Returns:
+            Valor escalar del campo o None si no existe/expiró
+        """
+        try:
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_CACHE_GET_FIELD, (path, key))
+                row = await cursor.fetchone()
+            
+            return row[0] if row else None
+                
+        except Exception as e:
+            logger.error(f"Error obteniendo campo del cache: {e}")
+            return None
+
     async def cleanup_expired_cache(self):
         """Limpiar entradas de cache expiradas"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    DELETE FROM cache_entries 
-                    WHERE expires_at IS NOT NULL 
-                    AND expires_at < ?
-                """, (datetime.now().isoformat(),))
-                await db.commit()
+            db = await self._conn()
+            async with self._write_lock:
+                await db.execute(_SQL_CACHE_CLEANUP)
                 
         except Exception as e:
             logger.error(f"Error limpiando cache expirado: {e}")
@@ -718,17 +1375,12 @@ class SQLiteManager:
         try:
             stats = {}
             
-            async with aiosqlite.connect(self.db_path) as db:
-                # Estadísticas de tablas
-                tables = [
-                    'code_executions', 'code_snippets', 'user_settings',
-                    'user_sessions', 'metrics', 'cache_entries', 'file_tracking'
-                ]
-                
-                for table in tables:
-                    cursor = await db.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = await cursor.fetchone()
-                    stats[f"{table}_count"] = count[0] if count else 0
+            async with self._reader() as db:
+                # Estadísticas de tablas (materializadas por triggers)
+                cursor = await db.execute("SELECT table_name, row_count FROM stats_rollup")
+                counts = dict(await cursor.fetchall())
+                for table in _ROLLUP_TABLES:
+                    stats[f"{table}_count"] = counts.get(table, 0)
                 
                 # Tamaño de base de datos
                 stats['db_size_bytes'] = self.db_path.stat().st_size
@@ -749,7 +1401,7 @@ class SQLiteManager:
                 count = await cursor.fetchone()
                 stats['active_sessions'] = count[0] if count else 0
                 
-                return stats
+            return stats
                 
         except Exception as e:
             logger.error(f"Error obteniendo estadísticas: {e}")
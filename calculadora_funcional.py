@@ -23,11 +23,20 @@ Perfecta para demostrar las capacidades de RepletO v2.0:
 """
 
 from typing import Callable, Union, List, Tuple, Optional
-from functools import reduce, partial
-from math import pi, e, sqrt, sin, cos, tan, log, exp
+from functools import partial, lru_cache
+from math import pi, e, sqrt, copysign
+from types import MappingProxyType
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Numba es opcional (ver backend/requirements.txt): sin él las expresiones
+# largas usan el mismo camino que las cortas
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # ===============================
 # 🔧 TIPOS Y CONSTANTES
 # ===============================
@@ -74,8 +83,132 @@ def raiz(numero: Numero, indice: Numero = 2) -> Numero:
     """Calcula la raíz n-ésima de un número"""
     if numero < 0 and indice % 2 == 0:
         raise ValueError("No se puede calcular raíz par de número negativo")
+    # Casos comunes sin pasar por pow genérico
+    if indice == 2:
+        return sqrt(numero)
+    if indice == 3:
+        return copysign(abs(numero) ** (1 / 3), numero)
     return numero ** (1 / indice)
 
+# ===============================
+# ⚡ KERNEL COMPILADO (NUMBA)
+# ===============================
+
+# Códigos de operación binaria que entiende el kernel
+CODIGOS_OPERACION = {'+': 0, '-': 1, '*': 2, '/': 3, '**': 4}
+
+# Operaciones en las que el kernel da exactamente lo mismo que Python cuando el
+# acumulador ya es float (** no: Python lanza OverflowError o devuelve complex)
+OPERACIONES_KERNEL = frozenset({'+', '-', '*', '/'})
+
+# Equivalentes vectorizados de las operaciones binarias
+UFUNCS_BINARIAS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.divide,
+    '**': np.power,
+}
+
+# A partir de cuántas operaciones compensa usar el kernel compilado
+UMBRAL_KERNEL = 32
+
+def _eval_kernel(codes: np.ndarray, nums: np.ndarray, start: float) -> float:
+    """Aplica secuencialmente las operaciones codificadas sobre el acumulador"""
+    acumulador = start
+    for i in range(codes.shape[0]):
+        codigo = codes[i]
+        numero = nums[i]
+        if codigo == 0:
+            acumulador = acumulador + numero
+        elif codigo == 1:
+            acumulador = acumulador - numero
+        elif codigo == 2:
+            acumulador = acumulador * numero
+        elif codigo == 3:
+            acumulador = acumulador / numero
+        else:
+            acumulador = acumulador ** numero
+    return acumulador
+
+if NUMBA_AVAILABLE:
+    _eval_kernel = njit(cache=True)(_eval_kernel)
+
+@lru_cache(maxsize=128)
+def _codificar_operaciones(operaciones: Tuple[str, ...]) -> np.ndarray:
+    """Traduce (y cachea) una secuencia de operaciones a códigos int8"""
+    codes = np.array([CODIGOS_OPERACION[op] for op in operaciones], dtype=np.int8)
+    codes.setflags(write=False)
+    return codes
+
+# Primitivas que se pueden escribir como operador en el código generado
+# (dividir se llama siempre para conservar su error de división por cero)
+_OPERADORES_INLINE = {
+    sumar: '+',
+    restar: '-',
+    multiplicar: '*',
+    potencia: '**',
+}
+
+@lru_cache(maxsize=128)
+def _compilar_expresion(funciones: Tuple[Callable, ...]) -> Callable[[List[Numero]], Numero]:
+    """
+    Genera una función en línea recta que evalúa la secuencia de operaciones
+    
+    Args:
+        funciones: Funciones binarias a aplicar en orden
+        
+    Returns:
+        Función que recibe la lista de números y devuelve el resultado
+    """
+    entorno = {}
+    lineas = ["def _expresion(n):", "    a = n[0]"]
+    for i, funcion in enumerate(funciones, 1):
+        operador = _OPERADORES_INLINE.get(funcion)
+        if operador is not None:
+            lineas.append(f"    a = a {operador} n[{i}]")
+        else:
+            entorno[f"f{i}"] = funcion
+            lineas.append(f"    a = f{i}(a, n[{i}])")
+    lineas.append("    return a")
+    
+    exec(compile("\n".join(lineas), "<expresion>", "exec"), entorno)
+    return entorno["_expresion"]
+
+def _ufunc_estricta(ufunc: np.ufunc) -> FuncionUnaria:
+    """
+    Envuelve una ufunc para que falle como su equivalente de math
+    
+    Sin esto np.log(-1) devuelve nan y np.log(0) -inf con solo un aviso;
+    aquí lanzan ValueError (y el desbordamiento OverflowError), tanto con
+    escalares como con arrays.
+    """
+    def funcion(x):
+        try:
+            with np.errstate(invalid='raise', divide='raise', over='raise'):
+                return ufunc(x)
+        except FloatingPointError as error:
+            if 'overflow' in str(error):
+                raise OverflowError("math range error") from None
+            raise ValueError("math domain error") from None
+    
+    funcion.__name__ = ufunc.__name__
+    return funcion
+
+@lru_cache(maxsize=128)
+def _componer(funciones: Tuple[Callable, ...]) -> Callable:
+    """
+    Compone funciones en una sola lambda: f0(f1(...fn(x)))
+    
+    Genera el código de la composición en lugar de anidar lambdas, de modo
+    que llamar a la función compuesta usa un solo frame de Python.
+    """
+    nombres = [f"f{i}" for i in range(len(funciones))]
+    cuerpo = "x"
+    for nombre in reversed(nombres):
+        cuerpo = f"{nombre}({cuerpo})"
+    return eval(f"lambda x: {cuerpo}", dict(zip(nombres, funciones)))
+
 # ===============================
 # 🧮 CALCULADORA FUNCIONAL
 # ===============================
@@ -91,27 +224,40 @@ class CalculadoraFuncional:
     - Transparencia referencial: Misma entrada = misma salida
     """
     
+    # Tablas de operaciones compartidas por todas las instancias, de solo lectura:
+    # una instancia no puede alterar las operaciones de las demás
+    _OPERACIONES = MappingProxyType({
+        '+': sumar,
+        '-': restar,
+        '*': multiplicar,
+        '/': dividir,
+        '**': potencia,
+        'sqrt': sqrt,
+        'cbrt': np.cbrt,
+    })
+    
+    # Ufuncs de NumPy: aceptan escalares y también arrays completos. Las que
+    # pueden salirse del dominio lanzan los mismos errores que math.*
+    _UNARIAS = MappingProxyType({
+        'sin': _ufunc_estricta(np.sin),
+        'cos': _ufunc_estricta(np.cos),
+        'tan': _ufunc_estricta(np.tan),
+        'log': _ufunc_estricta(np.log),
+        'exp': _ufunc_estricta(np.exp),
+        'abs': np.abs,
+        'neg': np.negative,
+    })
+    
     def __init__(self):
         """Inicializar con operaciones disponibles"""
-        self.operaciones = {
-            '+': sumar,
-            '-': restar,
-            '*': multiplicar,
-            '/': dividir,
-            '**': potencia,
-            'sqrt': lambda x: raiz(x, 2),
-            'cbrt': lambda x: raiz(x, 3),
-        }
+        self.operaciones = self._OPERACIONES
+        self.funciones_unarias = self._UNARIAS
         
-        self.funciones_unarias = {
-            'sin': sin,
-            'cos': cos,
-            'tan': tan,
-            'log': log,
-            'exp': exp,
-            'abs': abs,
-            'neg': lambda x: -x,
-        }
+        # Accesos precalculados para el camino rápido de calcular
+        self._binary = self.operaciones
+        self._unary = self.funciones_unarias
+        self._binary_get = self._binary.get
+        self._unary_get = self._unary.get
     
     def calcular(self, operacion: str, *args: Numero) -> Numero:
         """
@@ -127,18 +273,31 @@ class CalculadoraFuncional:
         Raises:
             ValueError: Si la operación no existe o argumentos inválidos
         """
-        if operacion in self.operaciones:
+        op = self._binary_get(operacion)
+        if op is not None:
             if len(args) != 2:
                 raise ValueError(f"Operación '{operacion}' requiere exactamente 2 argumentos")
-            return self.operaciones[operacion](*args)
+            return op(args[0], args[1])
         
-        elif operacion in self.funciones_unarias:
+        func = self._unary_get(operacion)
+        if func is not None:
             if len(args) != 1:
                 raise ValueError(f"Función '{operacion}' requiere exactamente 1 argumento")
-            return self.funciones_unarias[operacion](*args)
+            return func(args[0])
         
-        else:
-            raise ValueError(f"Operación '{operacion}' no reconocida")
+        raise ValueError(f"Operación '{operacion}' no reconocida")
+    
+    def _call_binary(self, operacion: str, a: Numero, b: Numero) -> Numero:
+        """
+        Aplica una operación binaria sin empaquetar *args
+        
+        Las operaciones no binarias pasan por calcular() para conservar sus
+        mensajes de error.
+        """
+        op = self._binary_get(operacion)
+        if op is None:
+            return self.calcular(operacion, a, b)
+        return op(a, b)
     
     def evaluar_expresion(self, numeros: List[Numero], operaciones: List[str]) -> Numero:
         """
@@ -154,16 +313,46 @@ class CalculadoraFuncional:
         if len(numeros) != len(operaciones) + 1:
             raise ValueError("Número incorrecto de operaciones para los números dados")
         
-        # Usar reduce para aplicar operaciones secuencialmente
-        def aplicar_operacion(acumulador: Numero, operacion_numero: Tuple[str, Numero]) -> Numero:
-            operacion, numero = operacion_numero
-            return self.calcular(operacion, acumulador, numero)
+        # Secuencias largas de operaciones binarias: plegado en código nativo.
+        # Solo si el primer número es float: con enteros Python da un int exacto
+        # y el kernel un float, así que el tipo dependería de la longitud
+        if (NUMBA_AVAILABLE and len(operaciones) >= UMBRAL_KERNEL
+                and isinstance(numeros[0], float)
+                and all(op in OPERACIONES_KERNEL for op in operaciones)):
+            return self._evaluar_con_kernel(numeros, operaciones)
+        
+        # Solo operaciones binarias: función generada y cacheada por secuencia
+        binarias = self._binary
+        if all(op in binarias for op in operaciones):
+            funciones = tuple(binarias[op] for op in operaciones)
+            return _compilar_expresion(funciones)(numeros)
+        
+        # Plegado secuencial (equivalente a reduce) sin tuplas intermedias
+        acumulador = numeros[0]
+        aplicar = self._call_binary
+        for i, operacion in enumerate(operaciones, 1):
+            acumulador = aplicar(operacion, acumulador, numeros[i])
+        return acumulador
+    
+    def _evaluar_con_kernel(self, numeros: List[Numero], operaciones: List[str]) -> float:
+        """
+        Evalúa la secuencia con el kernel compilado de Numba
+        
+        Args:
+            numeros: Lista de números
+            operaciones: Lista de operaciones binarias (+, -, *, /)
+            
+        Returns:
+            Resultado final (float)
+        """
+        codes = _codificar_operaciones(tuple(operaciones))
+        nums = np.asarray(numeros[1:], dtype=np.float64)
         
-        # Combinar operaciones con números (excepto el primero)
-        operaciones_numeros = list(zip(operaciones, numeros[1:]))
+        # Mismo error que dividir(); el kernel no lanza excepciones
+        if np.any((codes == CODIGOS_OPERACION['/']) & (nums == 0)):
+            raise ValueError("No se puede dividir por cero")
         
-        # Aplicar reduce para procesar toda la secuencia
-        return reduce(aplicar_operacion, operaciones_numeros, numeros[0])
+        return float(_eval_kernel(codes, nums, float(numeros[0])))
     
     def crear_funcion_personalizada(self, operaciones: List[str]) -> Callable:
         """
@@ -175,22 +364,37 @@ class CalculadoraFuncional:
         Returns:
             Función compuesta
         """
-        def componer(f: Callable, g: Callable) -> Callable:
-            return lambda x: f(g(x))
-        
         # Obtener funciones de las operaciones
-        funciones = [self.funciones_unarias[op] for op in operaciones if op in self.funciones_unarias]
+        unaria = self._unary_get
+        funciones = tuple(f for f in map(unaria, operaciones) if f is not None)
         
         if not funciones:
             raise ValueError("No se encontraron operaciones válidas")
         
-        # Componer todas las funciones usando reduce
-        return reduce(componer, funciones)
+        # Composición cacheada: misma lista de funciones, misma función compuesta
+        return _componer(funciones)
 
 # ===============================
 # 📊 UTILIDADES DE VISUALIZACIÓN
 # ===============================
 
+# Figura reutilizada entre llamadas a graficar_funcion (se crea al primer uso)
+_FIGURA = None
+_EJES = None
+
+def _obtener_ejes():
+    """
+    Devuelve la figura y los ejes compartidos, limpios para un nuevo gráfico
+    
+    Si la ventana se cerró (plt.show bloqueante), se crea una figura nueva.
+    """
+    global _FIGURA, _EJES
+    if _FIGURA is None or not plt.fignum_exists(_FIGURA.number):
+        _FIGURA, _EJES = plt.subplots(figsize=(10, 6))
+    else:
+        _EJES.clear()
+    return _FIGURA, _EJES
+
 def graficar_funcion(func: Callable[[float], float], 
                     rango: Tuple[float, float] = (-10, 10),
                     titulo: str = "Función matemática") -> None:
@@ -205,16 +409,21 @@ def graficar_funcion(func: Callable[[float], float],
     x = np.linspace(rango[0], rango[1], 1000)
     
     try:
-        y = [func(xi) for xi in x]
+        # Evaluación vectorizada; las funciones escalares usan el bucle
+        try:
+            y = np.broadcast_to(func(x), x.shape)
+        except (TypeError, ValueError):
+            y = [func(xi) for xi in x]
         
-        plt.figure(figsize=(10, 6))
-        plt.plot(x, y, 'b-', linewidth=2)
-        plt.grid(True, alpha=0.3)
-        plt.title(titulo, fontsize=14, fontweight='bold')
-        plt.xlabel('x', fontsize=12)
-        plt.ylabel('f(x)', fontsize=12)
-        plt.axhline(y=0, color='k', linewidth=0.5)
-        plt.axvline(x=0, color='k', linewidth=0.5)
+        figura, ax = _obtener_ejes()
+        ax.plot(x, y, 'b-', linewidth=2)
+        ax.grid(True, alpha=0.3)
+        ax.set_title(titulo, fontsize=14, fontweight='bold')
+        ax.set_xlabel('x', fontsize=12)
+        ax.set_ylabel('f(x)', fontsize=12)
+        ax.axhline(y=0, color='k', linewidth=0.5)
+        ax.axvline(x=0, color='k', linewidth=0.5)
+        figura.canvas.draw_idle()
         plt.show()
         
     except Exception as e:
@@ -234,21 +443,44 @@ def mostrar_tabla_operaciones(calc: CalculadoraFuncional,
     print(f"\n📋 Tabla de operación: {operacion}")
     print("=" * 50)
     
+    arr = np.asarray(numeros, dtype=float)
+    
     if operacion in calc.funciones_unarias:
         print("   x    │  f(x)")
         print("────────┼─────────")
-        for num in numeros:
-            try:
-                resultado = calc.calcular(operacion, num)
+        try:
+            # Una sola llamada vectorizada para toda la columna
+            resultados = calc.funciones_unarias[operacion](arr)
+        except Exception:
+            resultados = None
+        
+        if resultados is not None:
+            for num, resultado in zip(arr, resultados):
                 print(f"{num:7.2f} │ {resultado:8.3f}")
-            except Exception as e:
-                print(f"{num:7.2f} │ Error: {e}")
+        else:
+            for num in numeros:
+                try:
+                    resultado = calc.calcular(operacion, num)
+                    print(f"{num:7.2f} │ {resultado:8.3f}")
+                except Exception as e:
+                    print(f"{num:7.2f} │ Error: {e}")
     else:
         print("   x    │   y   │ resultado")
         print("────────┼───────┼──────────")
-        for i in range(0, len(numeros) - 1, 2):
-            if i + 1 < len(numeros):
-                x, y = numeros[i], numeros[i + 1]
+        pares = len(numeros) // 2
+        xs, ys = arr[0:2 * pares:2], arr[1:2 * pares:2]
+        ufunc = UFUNCS_BINARIAS.get(operacion)
+        
+        if ufunc is not None:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                resultados = ufunc(xs, ys)
+            for x, y, resultado in zip(xs, ys, resultados):
+                if operacion == '/' and y == 0:
+                    print(f"{x:7.2f} │ {y:5.2f} │ Error: No se puede dividir por cero")
+                else:
+                    print(f"{x:7.2f} │ {y:5.2f} │ {resultado:9.3f}")
+        else:
+            for x, y in zip(numeros[0:2 * pares:2], numeros[1:2 * pares:2]):
                 try:
                     resultado = calc.calcular(operacion, x, y)
                     print(f"{x:7.2f} │ {y:5.2f} │ {resultado:9.3f}")
@@ -311,14 +543,25 @@ def demo_avanzada():
     print("\n🔄 Creando función compuesta: sin(log(abs(x)))")
     try:
         func_compuesta = calc.crear_funcion_personalizada(['abs', 'log', 'sin'])
-        test_values = [1, 2, 5, 10]
+        test_values = np.array([1, 2, 5, 10], dtype=float)
+        
+        # Las hojas son ufuncs: la composición se evalúa sobre todo el array
+        try:
+            resultados = func_compuesta(test_values)
+        except (ValueError, OverflowError):
+            resultados = None
         
         print("   x    │ sin(log(abs(x)))")
         print("────────┼─────────────────")
         
-        for x in test_values:
-            resultado = func_compuesta(x)
-            print(f"{x:7.1f} │ {resultado:14.6f}")
+        if resultados is not None:
+            for x, resultado in zip(test_values, resultados):
+                print(f"{x:7.1f} │ {resultado:14.6f}")
+        else:
+            # Algún valor se sale del dominio: punto a punto hasta el error
+            for x in test_values:
+                resultado = func_compuesta(x)
+                print(f"{x:7.1f} │ {resultado:14.6f}")
             
     except Exception as e:
         print(f"❌ Error creando función: {e}")
@@ -333,8 +576,8 @@ def demo_visualizacion():
     # Crear funciones para graficar
     funciones_demo = [
         (lambda x: x**2, "Función cuadrática: f(x) = x²"),
-        (lambda x: sin(x), "Función seno: f(x) = sin(x)"),
-        (lambda x: exp(-x**2), "Campana de Gauss: f(x) = e^(-x²)"),
+        (np.sin, "Función seno: f(x) = sin(x)"),
+        (lambda x: np.exp(-x**2), "Campana de Gauss: f(x) = e^(-x²)"),
     ]
     
     for func, titulo in funciones_demo:
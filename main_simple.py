@@ -8,16 +8,19 @@ Versión minimalista funcional para probar la calculadora
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
 from contextlib import asynccontextmanager
+from string import Template
+import json
 import logging
 import os
+import time
 from datetime import datetime
 
 # Importar sandbox (básico por ahora)
-from backend.sandbox import execute_code
+from backend.sandbox import execute_code, execute_code_stream
 
 # Configurar logging
 logging.basicConfig(
@@ -49,14 +52,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Cerrando RepletO v2.0...")
 
+# Documentación interactiva (desactivar en producción con REPLETO_DOCS=0)
+DOCS = os.getenv("REPLETO_DOCS", "1") == "1"
+
 # Crear aplicación FastAPI con lifespan
 app = FastAPI(
     title="RepletO v2.0",
     description="IDE Web Híbrido Autoalojado",
     version="2.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc",
-    lifespan=lifespan
+    docs_url="/api/docs" if DOCS else None,
+    redoc_url="/api/redoc" if DOCS else None,
+    openapi_url="/openapi.json" if DOCS else None,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -83,10 +91,9 @@ class CodeExecutionResponse(BaseModel):
 # 🌐 ENDPOINTS REST
 # ===============================
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Página principal con información del servicio"""
-    return """
+# Página principal: HTML estático renderizado y codificado una sola vez al cargar el
+# módulo. $docs_link solo se rellena si la documentación está activa
+_ROOT_TEMPLATE = Template("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -172,7 +179,7 @@ async def root():
             <div class="status">✅ Backend Funcionando Perfectamente</div>
             
             <div class="links">
-                <a href="/api/docs" class="link">📖 Documentación API</a>
+                $docs_link
                 <a href="/frontend/" class="link">🚀 Abrir Editor</a>
                 <a href="/api/health" class="link">💚 Estado del Sistema</a>
             </div>
@@ -183,29 +190,44 @@ async def root():
         </div>
     </body>
     </html>
-    """
+    """)
+_DOCS_LINK = '<a href="/api/docs" class="link">📖 Documentación API</a>'
+_ROOT_BYTES = _ROOT_TEMPLATE.substitute(docs_link=_DOCS_LINK if DOCS else "").encode("utf-8")
+
+@app.get("/", response_class=HTMLResponse)
+async def root():
+    """Página principal con información del servicio"""
+    return Response(content=_ROOT_BYTES, media_type="text/html")
+
+# Respuesta de salud: solo cambia el timestamp, formateado una vez por segundo
+_HEALTH_BASE = {
+    "status": "healthy",
+    "service": "RepletO v2.0",
+    "version": "2.0.0",
+    "message": "🚀 Sistema funcionando perfectamente - Listo para calcular!",
+    "components": {
+        "sandbox": "operational",
+        "api": "operational", 
+        "frontend": "operational"
+    }
+}
+_last_ts = [0, ""]
 
 @app.get("/api/health")
 async def health_check():
     """Endpoint de salud del sistema"""
-    return {
-        "status": "healthy",
-        "service": "RepletO v2.0",
-        "version": "2.0.0",
-        "timestamp": datetime.now().isoformat(),
-        "message": "🚀 Sistema funcionando perfectamente - Listo para calcular!",
-        "components": {
-            "sandbox": "operational",
-            "api": "operational", 
-            "frontend": "operational"
-        }
-    }
+    t = int(time.time())
+    if t != _last_ts[0]:
+        _last_ts[0] = t
+        _last_ts[1] = datetime.fromtimestamp(t).isoformat()
+    return {**_HEALTH_BASE, "timestamp": _last_ts[1]}
 
-@app.post("/api/execute", response_model=CodeExecutionResponse)
-async def execute_code_endpoint(request: CodeExecutionRequest):
+async def _run(request: CodeExecutionRequest) -> dict:
     """
-    Ejecuta código Python en sandbox seguro
-    Perfecto para probar nuestra calculadora funcional!
+    Ejecuta el código y devuelve el resultado como dict plano
+    
+    Compartido por /api/execute y /run para que ambos usen una sola
+    ruta de serialización.
     """
     try:
         logger.info(f"Ejecutando código {request.language}: {request.code[:100]}...")
@@ -218,76 +240,68 @@ async def execute_code_endpoint(request: CodeExecutionRequest):
             )
         
         # Ejecutar código usando nuestro sandbox
-        import time
         start_time = time.time()
         
         result = execute_code(request.code)
         
         execution_time = time.time() - start_time
         
-        # Preparar respuesta
-        response = CodeExecutionResponse(
-            status=result["status"],
-            output=result["output"],
-            error=result.get("error"),
-            execution_time=execution_time
-        )
-        
         logger.info(f"Ejecución completada en {execution_time:.3f}s - Status: {result['status']}")
         
-        return response
+        # Preparar respuesta
+        return {
+            "status": result["status"],
+            "output": result["output"],
+            "error": result.get("error"),
+            "execution_time": execution_time
+        }
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error en ejecución: {e}")
-        return CodeExecutionResponse(
-            status="error",
-            output="",
-            error=f"Error interno: {str(e)}",
-            execution_time=None
-        )
-
-@app.post("/run")
-async def legacy_run_endpoint(request: CodeExecutionRequest):
-    """Endpoint legacy para compatibilidad con frontend existente"""
-    result = await execute_code_endpoint(request)
-    return result.dict()
-
-# ===============================
-# 🚀 EVENTOS DE LIFECYCLE
-# ===============================
+        return {
+            "status": "error",
+            "output": "",
+            "error": f"Error interno: {str(e)}",
+            "execution_time": None
+        }
 
-from contextlib import asynccontextmanager
+@app.post("/api/execute", response_model=CodeExecutionResponse)
+async def execute_code_endpoint(request: CodeExecutionRequest):
+    """
+    Ejecuta código Python en sandbox seguro
+    Perfecto para probar nuestra calculadora funcional!
+    """
+    return await _run(request)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    logger.info("🚀 Iniciando RepletO v2.0...")
-    logger.info("🎯 Sistema listo para la primera prueba!")
-    logger.info("🧮 Calculadora Funcional preparada para demo")
+@app.post("/api/execute/stream")
+async def execute_code_stream_endpoint(request: CodeExecutionRequest):
+    """
+    Ejecuta código Python emitiendo la salida como NDJSON según se produce
     
-    # Verificar frontend
-    frontend_path = "frontend"
-    if os.path.exists(frontend_path):
-        logger.info(f"✅ Frontend encontrado en /{frontend_path}/")
-    else:
-        logger.warning(f"⚠️ Frontend no encontrado en /{frontend_path}/")
+    Una línea {"type": "output", ...} por cada línea de stdout y una línea
+    final {"type": "status", ...} con el resultado y el tiempo de ejecución.
+    """
+    if request.language.lower() != "python":
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Lenguaje '{request.language}' no soportado aún. Use 'python'."
+        )
     
-    yield
+    def _lineas():
+        start_time = time.time()
+        for evento in execute_code_stream(request.code):
+            if evento["type"] == "status":
+                evento["execution_time"] = time.time() - start_time
+            yield json.dumps(evento, ensure_ascii=False).encode("utf-8") + b"\n"
     
-    # Shutdown
-    logger.info("🛑 Cerrando RepletO v2.0...")
+    return StreamingResponse(_lineas(), media_type="application/x-ndjson")
 
-# Crear aplicación FastAPI con lifespan
-app = FastAPI(
-    title="RepletO v2.0",
-    description="IDE Web Híbrido Autoalojado",
-    version="2.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc",
-    lifespan=lifespan
-)
+@app.post("/run")
+async def legacy_run_endpoint(request: CodeExecutionRequest):
+    """Endpoint legacy para compatibilidad con frontend existente"""
+    return await _run(request)
 
 # ===============================
 # 🏃‍♂️ EJECUCIÓN PRINCIPAL
@@ -298,10 +312,19 @@ if __name__ == "__main__":
     
     logger.info("🎨 RepletO v2.0 - Iniciando servidor de desarrollo...")
     
+    # uvloop no existe en Windows: caer al loop de asyncio si falta
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    
     uvicorn.run(
         "main_simple:app",  # Usar este archivo
         host="0.0.0.0",
         port=8000,
+        loop=loop_impl,
+        http="httptools",
         reload=True,
         log_level="info"
     )
\ No newline at end of file
@@ -22,14 +22,22 @@ class RepletOHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=FRONTEND_DIR, **kwargs)
     
+    # Headers de seguridad y CORS ya codificados, se agregan en un solo append
+    _EXTRA_HEADERS = (
+        b"Access-Control-Allow-Origin: *\r\n"
+        b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+        b"Access-Control-Allow-Headers: Content-Type\r\n"
+        b"Cache-Control: no-cache, no-store, must-revalidate\r\n"
+        b"Pragma: no-cache\r\n"
+        b"Expires: 0\r\n"
+    )
+    
     def end_headers(self):
-        # Agregar headers de seguridad y CORS
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        # HTTP/0.9 no lleva headers (mismo criterio que send_header)
+        if self.request_version != 'HTTP/0.9':
+            if not hasattr(self, '_headers_buffer'):
+                self._headers_buffer = []
+            self._headers_buffer.append(self._EXTRA_HEADERS)
         super().end_headers()
     
     def do_OPTIONS(self):
@@ -42,32 +50,39 @@ class RepletOHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         timestamp = self.log_date_time_string()
         print(f"[{timestamp}] {format % args}")
 
+def _listar_nombres(path):
+    """Devuelve los nombres presentes en un directorio con un solo scandir"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
 def check_frontend_directory():
     """Verifica que el directorio frontend existe y tiene los archivos necesarios"""
-    frontend_path = Path(FRONTEND_DIR)
+    raiz = _listar_nombres(FRONTEND_DIR)
     
-    if not frontend_path.exists():
+    if raiz is None:
         print(f"❌ Error: El directorio '{FRONTEND_DIR}' no existe")
         print(f"   Asegúrate de ejecutar este script desde el directorio raíz del proyecto")
         return False
     
-    index_file = frontend_path / "index.html"
-    if not index_file.exists():
+    if "index.html" not in raiz:
         print(f"❌ Error: No se encuentra 'index.html' en '{FRONTEND_DIR}'")
         return False
     
-    # Verificar archivos importantes
-    important_files = [
-        "css/styles.css",
-        "js/main.js",
-        "js/api.js",
-        "js/editor.js"
-    ]
+    # Verificar archivos importantes (un scandir por subdirectorio)
+    important_files = {
+        "css": ("styles.css",),
+        "js": ("main.js", "api.js", "editor.js"),
+    }
     
     missing_files = []
-    for file in important_files:
-        if not (frontend_path / file).exists():
-            missing_files.append(file)
+    for subdir, nombres in important_files.items():
+        presentes = _listar_nombres(os.path.join(FRONTEND_DIR, subdir)) if subdir in raiz else None
+        for nombre in nombres:
+            if not presentes or nombre not in presentes:
+                missing_files.append(f"{subdir}/{nombre}")
     
     if missing_files:
         print(f"⚠️  Advertencia: Faltan algunos archivos:")
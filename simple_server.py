@@ -5,54 +5,439 @@
 Versión estable sin problemas de uvicorn reload
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from jinja2 import DictLoader, Environment
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import ast
+import asyncio
+import atexit
+import builtins
+import codecs
+import ctypes
+import gzip
+import hashlib
+import io
+import json
+import math
+import mimetypes
+import operator
 import os
+import queue
+import re
+import signal
+import sys
+import threading
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+SIGXCPU = getattr(signal, "SIGXCPU", None)
+
+# Brotli opcional: sin él las páginas se sirven con gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configurar logging (nivel por variable de entorno LOG_LEVEL)
+# Los handlers solo encolan; un hilo aparte hace la escritura en stderr
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler(sys.stderr)
+_log_listener = QueueListener(_log_queue, _log_stream)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
+# Usar Python del entorno virtual (se resuelve una sola vez al arrancar)
+VENV_PYTHON = os.path.join(os.getcwd(), '.venv', 'Scripts', 'python.exe')
+PYTHON_EXECUTABLE = VENV_PYTHON if os.path.exists(VENV_PYTHON) else sys.executable
+
+# Flags de los intérpretes de usuario: aislado (-I: sin PYTHON*, site de usuario ni cwd
+# en sys.path), sin escribir .pyc (-B) y stdio en UTF-8. Se mantiene site para que los
+# paquetes instalados sigan importables
+PYTHON_FLAGS = ("-I", "-B", "-X", "utf8")
+
+EXEC_TIMEOUT = 10
+# Límites por ejecución del código de usuario (memoria de cada intérprete, segundos de CPU)
+EXEC_MEMORY_LIMIT = 256 * 1024 * 1024
+EXEC_CPU_LIMIT = 5
+# Procesos de uvicorn; cada uno arranca su propio pool, así que se reparten los núcleos
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", min(4, os.cpu_count() or 1)))
+POOL_SIZE = max(1, min(4, os.cpu_count() or 1) // WEB_WORKERS)
+
+# Programa de cada worker: lee UN fragmento enmarcado por stdin (longitud en 4 bytes
+# big-endian + bytes), lo ejecuta y responde {status, output, error} enmarcado igual. Es de
+# un solo uso: lo que el código toque (builtins, sys.modules, descriptores) muere con el
+# proceso. Se arranca antes de la petición con los módulos habituales ya importados, así
+# que "import math" en el código de usuario es solo una consulta a sys.modules.
+# argv: límite de memoria en bytes y de CPU en segundos
+WORKER_SRC = r"""
+import builtins, io, json, math, os, sys, traceback
+import collections, datetime, functools, itertools, random
+from contextlib import redirect_stdout, redirect_stderr
+
+mem_limit, cpu_limit = int(sys.argv[1]), int(sys.argv[2])
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if resource is not None:
+    # Memoria con límite duro: el código de usuario no puede subirlo
+    resource.setrlimit(resource.RLIMIT_AS, (mem_limit, mem_limit))
+    # RLIMIT_NPROC cuenta todos los procesos e hilos del uid, no los de este proceso: con
+    # (0, 0) falla también crear hilos (OpenBLAS, ThreadPoolExecutor) y root lo ignora.
+    # Solo frena fork/spawn de forma fiable con un uid dedicado al sandbox
+    if os.geteuid() != 0:
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+elif sys.platform == "win32":
+    # Windows: Job Object con tope de memoria y un único proceso activo (requiere pywin32)
+    try:
+        import win32api, win32job
+    except ImportError:
+        pass
+    else:
+        job = win32job.CreateJobObject(None, "")
+        info = win32job.QueryInformationJobObject(job, win32job.JobObjectExtendedLimitInformation)
+        info["ProcessMemoryLimit"] = mem_limit
+        info["BasicLimitInformation"]["ActiveProcessLimit"] = 1
+        info["BasicLimitInformation"]["LimitFlags"] |= (
+            win32job.JOB_OBJECT_LIMIT_PROCESS_MEMORY | win32job.JOB_OBJECT_LIMIT_ACTIVE_PROCESS
+        )
+        win32job.SetInformationJobObject(job, win32job.JobObjectExtendedLimitInformation, info)
+        win32job.AssignProcessToJobObject(job, win32api.GetCurrentProcess())
+
+def serve(proto_in, proto_out):
+    # El canal de protocolo solo existe como argumentos de esta función, no como globales
+    # del módulo; aun así no es aislamiento: el proceso se descarta tras la respuesta
+    header = proto_in.read(4)
+    if len(header) < 4:
+        return
+    src = proto_in.read(int.from_bytes(header, "big")).decode("utf-8")
+    out, err = io.StringIO(), io.StringIO()
+    status = "success"
+    if resource is not None:
+        # RLIMIT_CPU es acumulado: conceder cpu_limit segundos más que lo gastado al arrancar
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        resource.setrlimit(
+            resource.RLIMIT_CPU, (math.ceil(usage.ru_utime + usage.ru_stime) + cpu_limit, cpu_hard)
+        )
+    try:
+        with redirect_stdout(out), redirect_stderr(err):
+            exec(
+                compile(src, "<user>", "exec"),
+                {"__name__": "__main__", "__builtins__": dict(vars(builtins))},
+            )
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status = "error"
+            if isinstance(e.code, str):
+                err.write(e.code + "\n")
+    except BaseException:
+        status = "error"
+        etype, value, tb = sys.exc_info()
+        traceback.print_exception(etype, value, tb.tb_next, file=err)
+    payload = json.dumps({
+        "status": status,
+        "output": out.getvalue(),
+        "error": err.getvalue() if status == "error" else None,
+    }).encode("utf-8")
+    proto_out.write(len(payload).to_bytes(4, "big") + payload)
+    proto_out.flush()
+
+# El stdout del proceso pasa a /dev/null para que nada del usuario se cuele en el protocolo
+_proto_out = os.fdopen(os.dup(1), "wb")
+os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+_proto_in = sys.stdin.buffer
+sys.stdin = io.StringIO()
+serve(_proto_in, _proto_out)
+"""
+
+# Programa de los intérpretes de un solo uso: se pone sus propios límites (como los
+# workers, sin preexec_fn, que no es seguro con los hilos del servidor) y ejecuta stdin.
+# argv: límite de memoria en bytes y de CPU en segundos
+RUNNER_SRC = r"""
+import os, sys, traceback
+
+mem_limit, cpu_limit = int(sys.argv[1]), int(sys.argv[2])
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if resource is not None:
+    resource.setrlimit(resource.RLIMIT_AS, (mem_limit, mem_limit))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    # Ver WORKER_SRC: por uid, bloquea también hilos y no aplica a root
+    if os.geteuid() != 0:
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+src = sys.stdin.read()
+sys.argv = ["-"]
+try:
+    exec(compile(src, "<stdin>", "exec"), {"__name__": "__main__"})
+except SystemExit:
+    raise
+except BaseException:
+    # Traceback sin el marco de este programa, como si se hubiera lanzado "python -"
+    etype, value, tb = sys.exc_info()
+    traceback.print_exception(etype, value, tb.tb_next)
+    sys.exit(1)
+"""
+
+RUNNER_ARGS = ("-c", RUNNER_SRC, str(EXEC_MEMORY_LIMIT), str(EXEC_CPU_LIMIT))
+
+class Worker:
+    """Proceso Python precalentado que ejecuta un único fragmento enviado por stdin"""
+    
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+    
+    @classmethod
+    async def spawn(cls) -> "Worker":
+        proc = await asyncio.create_subprocess_exec(
+            PYTHON_EXECUTABLE, *PYTHON_FLAGS, "-c", WORKER_SRC, str(EXEC_MEMORY_LIMIT), str(EXEC_CPU_LIMIT),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        return cls(proc)
+    
+    @property
+    def alive(self) -> bool:
+        # stdin cerrado = worker ya usado o matado pero aún sin recoger (returncode en None)
+        return self.proc.returncode is None and not self.proc.stdin.is_closing()
+    
+    async def run(self, code: str) -> Dict[str, Any]:
+        data = code.encode("utf-8")
+        self.proc.stdin.write(len(data).to_bytes(4, "big") + data)
+        await self.proc.stdin.drain()
+        size = int.from_bytes(await self.proc.stdout.readexactly(4), "big")
+        return json.loads(await self.proc.stdout.readexactly(size))
+    
+    async def kill(self):
+        if self.proc.returncode is None:
+            self.proc.kill()
+        await self.proc.wait()
+
+class WorkerPool:
+    """Pool de workers precalentados: el arranque del intérprete queda fuera de la petición.
+    
+    Cada worker atiende una sola ejecución y se repone en segundo plano, así que nada de
+    lo que haga el código de usuario llega a la siguiente petición.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._workers = []
+        # Peticiones pendientes (code, timeout, future) y límite de ejecuciones en vuelo
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._admission = asyncio.Semaphore(size * 2)
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running = set()
+    
+    async def start(self):
+        for _ in range(self.size):
+            worker = await Worker.spawn()
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+    
+    async def run(self, code: str, timeout: float = EXEC_TIMEOUT) -> Dict[str, Any]:
+        """Encola la ejecución; con más de size*2 en vuelo el llamante espera aquí"""
+        async with self._admission:
+            future = asyncio.get_running_loop().create_future()
+            self._pending.put_nowait((code, timeout, future))
+            return await future
+    
+    def _track(self, coro):
+        task = asyncio.create_task(coro)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _dispatch_loop(self):
+        """Lanza una tarea por petición; cada una espera en _idle a un worker libre"""
+        while True:
+            item = await self._pending.get()
+            self._track(self._dispatch(*item))
+    
+    async def _dispatch(self, code: str, timeout: float, future: asyncio.Future):
+        if future.cancelled():
+            return
+        try:
+            result = await self._run_on_worker(code, timeout)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+    
+    async def _replace(self, worker: Worker) -> Worker:
+        """Mata un worker (usado, colgado o muerto) y arranca otro en su lugar"""
+        await worker.kill()
+        new = await Worker.spawn()
+        self._workers[self._workers.index(worker)] = new
+        return new
+    
+    async def _respawn(self, worker: Worker):
+        try:
+            worker = await self._replace(worker)
+        except OSError as e:
+            # Se devuelve el muerto: el próximo _run_on_worker reintenta el arranque
+            logger.error(f"No se pudo reponer un worker: {e}")
+        self._idle.put_nowait(worker)
+    
+    async def _run_on_worker(self, code: str, timeout: float) -> Dict[str, Any]:
+        worker = await self._idle.get()
+        try:
+            if not worker.alive:
+                worker = await self._replace(worker)
+            return await asyncio.wait_for(worker.run(code), timeout)
+        except asyncio.TimeoutError:
+            return {
+                "status": "error",
+                "output": "",
+                "error": f"Tiempo de ejecución excedido ({timeout}s)"
+            }
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # El código de usuario terminó el proceso (os._exit, señal, límite de CPU, ...)
+            # o escribió basura en el canal de protocolo
+            await worker.kill()
+            if SIGXCPU is not None and worker.proc.returncode == -SIGXCPU:
+                error = f"Límite de CPU excedido ({EXEC_CPU_LIMIT}s)"
+            else:
+                error = "El proceso de ejecución terminó inesperadamente"
+            return {
+                "status": "error",
+                "output": "",
+                "error": error
+            }
+        finally:
+            # Usado, colgado o cancelado a medias: nunca vuelve a _idle tal cual
+            if worker.alive:
+                worker.proc.stdin.close()
+            self._track(self._respawn(worker))
+    
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        # Cancelar una ejecución programa la reposición de su worker: repetir hasta vaciar
+        while self._running:
+            tasks = list(self._running)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        while not self._pending.empty():
+            self._pending.get_nowait()[2].cancel()
+        for worker in self._workers:
+            await worker.kill()
+        self._workers.clear()
+
+# Pool global (se crea en el arranque de la aplicación)
+worker_pool: Optional[WorkerPool] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global worker_pool
+    pool = WorkerPool(POOL_SIZE)
+    await pool.start()
+    worker_pool = pool
+    logger.info(f"Pool de ejecución listo con {POOL_SIZE} workers")
+    
+    yield
+    
+    worker_pool = None
+    await pool.close()
+
 # Crear aplicación FastAPI SIMPLE
-app = FastAPI(title="RepletO v2.0", version="2.0.0-simple")
+app = FastAPI(
+    title="RepletO v2.0",
+    version="2.0.0-simple",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
-# CORS básico
+# CORS básico (preflight cacheado 24h por el navegador)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["content-type", "x-session-id"],
+    max_age=86400,
 )
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    logger.info("Accediendo a la página principal")
-    frontend_status = "✅ Frontend encontrado" if os.path.exists("frontend") else "❌ Frontend no encontrado"
-    return f"""
+# Estado del frontend (se comprueba una sola vez al importar)
+FRONTEND_EXISTS = os.path.exists("frontend")
+
+PAGE_CACHE_CONTROL = "public, max-age=3600"
+
+def _etag(body: bytes) -> str:
+    """ETag fuerte a partir del hash del contenido"""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+# Variantes de una página: codificación -> (cuerpo, ETag)
+Page = Dict[str, Tuple[bytes, str]]
+
+def _page(body: bytes) -> Page:
+    """Precomprime la página una sola vez (brotli calidad 11 si está instalado, y gzip)"""
+    etag = _etag(body)
+    variants = {
+        "identity": (body, etag),
+        "gzip": (gzip.compress(body, 9), etag[:-1] + '-gzip"'),
+    }
+    if brotli is not None:
+        variants["br"] = (brotli.compress(body, quality=11), etag[:-1] + '-br"')
+    return variants
+
+def _cached_response(request: Request, page: Page, media_type: str = "text/html") -> Response:
+    """Respuesta cacheable y comprimida; 304 si el cliente ya tiene esta versión"""
+    accept = request.headers.get("accept-encoding", "")
+    if "br" in accept and "br" in page:
+        encoding = "br"
+    elif "gzip" in accept:
+        encoding = "gzip"
+    else:
+        encoding = "identity"
+    body, etag = page[encoding]
+    headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+# Plantilla de la página principal, compilada una sola vez por Jinja2
+ROOT_SRC = """
     <!DOCTYPE html>
     <html>
     <head>
         <title>RepletO v2.0 SIMPLE</title>
         <style>
-            body {{ 
+            body { 
                 font-family: Arial, sans-serif; 
                 text-align: center; 
                 padding: 50px; 
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
-            }}
-            .container {{
+            }
+            .container {
                 max-width: 600px;
                 margin: 0 auto;
                 padding: 40px;
                 background: rgba(255,255,255,0.1);
                 border-radius: 20px;
-            }}
-            .link {{
+            }
+            .link {
                 display: inline-block;
                 margin: 20px;
                 padding: 15px 30px;
@@ -61,8 +446,8 @@ async def root():
                 text-decoration: none;
                 border-radius: 10px;
                 font-size: 18px;
-            }}
-            .link:hover {{ background: #45a049; }}
+            }
+            .link:hover { background: #45a049; }
         </style>
     </head>
     <body>
@@ -71,21 +456,33 @@ async def root():
             <h2>Servidor Simple Funcionando ✅</h2>
             <a href="/frontend/" class="link">🚀 Abrir Editor</a>
             <a href="/api/health" class="link">💚 Estado</a>
-            <p>Frontend path: {frontend_status}</p>
+            <p>Frontend path: {{ frontend_status }}</p>
         </div>
     </body>
     </html>
     """
 
+_templates = Environment(loader=DictLoader({"root": ROOT_SRC}), autoescape=True)
+ROOT_TPL = _templates.get_template("root")
+
+FRONTEND_STATUS = "✅ Frontend encontrado" if FRONTEND_EXISTS else "❌ Frontend no encontrado"
+
+# Páginas estáticas renderizadas y codificadas una sola vez
+ROOT_HTML = ROOT_TPL.render(frontend_status=FRONTEND_STATUS).encode("utf-8")
+
+ROOT_PAGE = _page(ROOT_HTML)
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    logger.debug("Accediendo a la página principal")
+    return _cached_response(request, ROOT_PAGE)
+
 @app.get("/api/health")
 async def health():
-    logger.info("Health check solicitado")
+    logger.debug("Health check solicitado")
     return {"status": "healthy", "message": "RepletO v2.0 Simple funcionando"}
 
-@app.get("/test")
-async def test_execution():
-    """Página de prueba rápida para verificar ejecución"""
-    return HTMLResponse("""
+TEST_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -116,21 +513,39 @@ async def test_execution():
             output.textContent = 'Ejecutando...';
             
             try {
-                const response = await fetch('/api/execute', {
+                // La salida llega como Server-Sent Events según el programa imprime
+                const response = await fetch('/api/execute/stream', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ code: codigo })
                 });
                 
-                const result = await response.json();
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let salida = '';
                 
-                if (result.status === 'success') {
-                    output.textContent = `✅ ÉXITO:\\n\\nOUTPUT:\\n${result.output}`;
-                } else {
-                    output.textContent = `❌ ERROR:\\n\\nSTATUS: ${result.status}\\nOUTPUT: ${result.output || 'N/A'}\\nERROR: ${result.error || 'N/A'}`;
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const eventos = buffer.split('\n\n');
+                    buffer = eventos.pop();
+                    
+                    for (const evento of eventos) {
+                        const datos = JSON.parse(evento.slice('data: '.length));
+                        if (datos.type === 'output') {
+                            salida += datos.data;
+                            output.textContent = `⏳ EJECUTANDO:\n\nOUTPUT:\n${salida}`;
+                        } else if (datos.status === 'success') {
+                            output.textContent = `✅ ÉXITO:\n\nOUTPUT:\n${salida}`;
+                        } else {
+                            output.textContent = `❌ ERROR:\n\nSTATUS: ${datos.status}\nOUTPUT: ${salida || 'N/A'}\nERROR: ${datos.error || 'N/A'}`;
+                        }
+                    }
                 }
             } catch (error) {
-                output.textContent = `❌ ERROR DE CONEXIÓN:\\n\\n${error}`;
+                output.textContent = `❌ ERROR DE CONEXIÓN:\n\n${error}`;
             }
         }
         
@@ -167,94 +582,471 @@ print("=== MATEMATICAS OK ===")`;
         </script>
     </body>
     </html>
-    """)
+    """.encode("utf-8")
+
+SIMPLE_HTML_PATH = os.path.join("frontend", "simple.html")
+if os.path.exists(SIMPLE_HTML_PATH):
+    with open(SIMPLE_HTML_PATH, "rb") as f:
+        SIMPLE_HTML: Optional[bytes] = f.read()
+else:
+    SIMPLE_HTML = None
+
+TEST_PAGE = _page(TEST_HTML)
+SIMPLE_PAGE = _page(SIMPLE_HTML) if SIMPLE_HTML is not None else None
+
+@app.get("/test")
+async def test_execution(request: Request):
+    """Página de prueba rápida para verificar ejecución"""
+    return _cached_response(request, TEST_PAGE)
 
 @app.get("/simple")
-async def simple_editor():
+async def simple_editor(request: Request):
     """Editor simple que definitivamente funciona"""
-    with open("frontend/simple.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content)
+    if SIMPLE_PAGE is None:
+        raise HTTPException(status_code=404, detail=f"No se encuentra {SIMPLE_HTML_PATH}")
+    return _cached_response(request, SIMPLE_PAGE)
 
-@app.post("/api/execute")
-async def execute_code(request: dict):
-    """Ejecutor básico de código"""
-    logger.info(f"Ejecutando código: {request.get('code', '')[:50]}...")
-    code = request.get("code", "")
+# ===== Ruta rápida en proceso =====
+# Fragmentos triviales (prints, aritmética, math) se ejecutan con exec() en un
+# hilo, sin lanzar intérprete. Solo se admite un subconjunto del AST sin bucles,
+# definiciones, contenedores ni atributos privados: los valores son escalares y
+# cadenas, y las operaciones que pueden hacerlas crecer pasan por guardas. Así
+# ninguna llamada en C puede reservar más que unos pocos FAST_PATH_MAX_SIZE.
+# Cualquier cosa fuera de eso va al pool de workers.
+
+FAST_PATH_TIMEOUT = 5
+FAST_PATH_MAX_CODE = 4000
+FAST_PATH_MAX_SIZE = 100_000  # caracteres/bits por valor y caracteres de salida en total
+
+ALLOWED_MODULES = frozenset({"math"})
+
+ALLOWED_MATH_ATTRS = frozenset({
+    "pi", "e", "tau", "inf", "nan",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2", "hypot",
+    "sqrt", "exp", "log", "log10", "log2", "pow",
+    "floor", "ceil", "trunc", "fabs", "degrees", "radians", "isclose",
+})
+
+_FAST_NODES = (
+    ast.Module, ast.Expr, ast.Assign, ast.AugAssign, ast.Pass, ast.If,
+    ast.Import, ast.alias,
+    ast.Name, ast.Load, ast.Store, ast.Constant, ast.JoinedStr, ast.FormattedValue,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.keyword, ast.Attribute, ast.Subscript, ast.Slice,
+    ast.Tuple,  # solo como destino: a, b = divmod(...)
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.BitAnd, ast.BitOr, ast.BitXor,
+    ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+# Especificadores de formato cortos (":.2f", ":d", ":%"): sin anchos ni precisiones enormes
+_FORMAT_SPEC = re.compile(r"(\.\d)?[dfegs%]?")
+
+class _Unsafe(Exception):
+    """El fragmento se sale de la ruta rápida: ejecutarlo en un worker"""
+
+# Tipos que se pueden imprimir o formatear: su texto no depende del proceso
+_PRINTABLE = (str, int, float, complex, bool, type(None))
+
+def _guard_size(value: Any) -> Any:
+    if isinstance(value, int) and not isinstance(value, bool):
+        if value.bit_length() > FAST_PATH_MAX_SIZE:
+            raise _Unsafe()
+    elif isinstance(value, (str, bytes)) and len(value) > FAST_PATH_MAX_SIZE:
+        raise _Unsafe()
+    return value
+
+def _guard_value(value: Any) -> Any:
+    # Funciones y módulos se imprimen con direcciones: la salida variaría entre rutas
+    if not isinstance(value, _PRINTABLE):
+        raise _Unsafe()
+    return value
+
+def _guarded_binop(op: ast.operator):
+    fn = {
+        ast.Add: operator.add, ast.Mult: operator.mul, ast.Pow: operator.pow,
+        ast.Mod: operator.mod,
+    }[type(op)]
     
-    if not code.strip():
-        return {
-            "status": "error",
-            "output": "",
-            "error": "No hay código para ejecutar"
-        }
+    def guarded(a, b):
+        # Formato %: "%999999999d" reservaría la memoria antes de poder medirla
+        if fn is operator.mod and isinstance(a, (str, bytes)):
+            raise _Unsafe()
+        # Pow entero: acotar el exponente antes de calcular nada
+        if fn is operator.pow and isinstance(a, int) and isinstance(b, int) and abs(a) > 1 \
+                and b * a.bit_length() > FAST_PATH_MAX_SIZE:
+            raise _Unsafe()
+        if fn is operator.mul:
+            for seq, n in ((a, b), (b, a)):
+                if isinstance(seq, (str, bytes, tuple)) and isinstance(n, int) \
+                        and len(seq) * n > FAST_PATH_MAX_SIZE:
+                    raise _Unsafe()
+        return _guard_size(fn(a, b))
+    return guarded
+
+_GUARDED_OPS = (ast.Add, ast.Mult, ast.Pow, ast.Mod)
+_GUARD_NAMES = {op: f"__guard_{op.__name__.lower()}__" for op in _GUARDED_OPS}
+_GUARDS = {name: _guarded_binop(op()) for op, name in _GUARD_NAMES.items()}
+_GUARDS["__guard_size__"] = _guard_size
+_GUARDS["__guard_value__"] = _guard_value
+
+def _guard_call(name: str, node: ast.expr) -> ast.Call:
+    return ast.copy_location(ast.Call(ast.Name(name, ast.Load()), [node], []), node)
+
+class _GuardOps(ast.NodeTransformer):
+    """
+    Reescribe +, *, ** y % (y sus formas aumentadas) como llamadas guardadas,
+    y los f-strings para que solo formateen escalares y su resultado quede acotado
+    """
+    
+    def visit_FormattedValue(self, node: ast.FormattedValue) -> ast.AST:
+        self.generic_visit(node)
+        node.value = _guard_call("__guard_value__", node.value)
+        return node
+    
+    def visit_JoinedStr(self, node: ast.JoinedStr) -> ast.AST:
+        self.generic_visit(node)
+        return _guard_call("__guard_size__", node)
     
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        name = _GUARD_NAMES.get(type(node.op))
+        if name is None:
+            return node
+        return ast.copy_location(
+            ast.Call(ast.Name(name, ast.Load()), [node.left, node.right], []), node
+        )
+    
+    def visit_AugAssign(self, node: ast.AugAssign) -> ast.AST:
+        self.generic_visit(node)
+        name = _GUARD_NAMES.get(type(node.op))
+        if name is None or not isinstance(node.target, ast.Name):
+            return node
+        value = ast.Call(
+            ast.Name(name, ast.Load()), [ast.Name(node.target.id, ast.Load()), node.value], []
+        )
+        return ast.copy_location(ast.Assign([node.target], value), node)
+
+def _fast_path_ok(tree: ast.AST) -> bool:
+    """True si el AST solo usa construcciones de la lista blanca"""
+    for node in ast.walk(tree):
+        if not isinstance(node, _FAST_NODES):
+            return False
+        if isinstance(node, ast.Name) and node.id.startswith("_"):
+            return False
+        if isinstance(node, ast.Tuple) and not isinstance(node.ctx, ast.Store):
+            return False
+        if isinstance(node, ast.Import):
+            if any(a.name not in ALLOWED_MODULES or a.asname for a in node.names):
+                return False
+        if isinstance(node, ast.Attribute):
+            # Solo leer math.<constante/función>: sin métodos de str/list que reserven memoria
+            if not (isinstance(node.ctx, ast.Load)
+                    and isinstance(node.value, ast.Name) and node.value.id == "math"
+                    and node.attr in ALLOWED_MATH_ATTRS):
+                return False
+        if isinstance(node, ast.FormattedValue) and node.format_spec is not None:
+            spec = node.format_spec
+            if not (isinstance(spec, ast.JoinedStr) and len(spec.values) == 1
+                    and isinstance(spec.values[0], ast.Constant)
+                    and _FORMAT_SPEC.fullmatch(spec.values[0].value)):
+                return False
+    return True
+
+SAFE_BUILTINS = {
+    name: getattr(builtins, name) for name in (
+        "abs", "bool", "divmod", "float", "int", "len", "max", "min", "round",
+    )
+}
+
+def _safe_str(value: Any = "") -> str:
+    return str(_guard_value(value))
+
+def _import_math(name, *args, **kwargs):
+    # _fast_path_ok ya garantiza que el único import posible es math
+    return math
+
+def _fast_compile(code: str) -> Optional[Any]:
+    """Código compilado con guardas, o None si no cabe en la ruta rápida"""
+    if len(code) > FAST_PATH_MAX_CODE:
+        return None
     try:
-        # Ejecución básica y SEGURA con Python del entorno virtual
-        import subprocess
-        import tempfile
-        import sys
-        import os
-        
-        # Usar Python del entorno virtual
-        venv_python = os.path.join(os.getcwd(), '.venv', 'Scripts', 'python.exe')
-        python_executable = venv_python if os.path.exists(venv_python) else sys.executable
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-            f.write(code)
-            temp_path = f.name
-        
-        # Configurar entorno con UTF-8
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        env['PYTHONPATH'] = os.getcwd()
-        
-        result = subprocess.run(
-            [python_executable, temp_path],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            encoding='utf-8',
-            env=env
+        tree = ast.parse(code, "<user>", "exec")
+    except SyntaxError:
+        return None
+    if not _fast_path_ok(tree):
+        return None
+    tree = ast.fix_missing_locations(_GuardOps().visit(tree))
+    return compile(tree, "<user>", "exec")
+
+def _raise_in_thread(ident: int, exc_type: Optional[type]):
+    """Programa exc_type en el hilo ident; con None borra la que estuviera pendiente"""
+    exc = ctypes.py_object(exc_type) if exc_type is not None else None
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), exc)
+
+def _fast_exec(code_obj: Any) -> Optional[Dict[str, Any]]:
+    """Ejecuta en el hilo actual; None si hay que repetir la ejecución en un worker"""
+    out = io.StringIO()
+    written = 0
+    
+    def _print(*args, sep=" ", end="\n", **_ignored):
+        # Medir cada trozo antes de unir: la salida total queda acotada por FAST_PATH_MAX_SIZE
+        nonlocal written
+        sep = " " if sep is None else sep
+        end = "\n" if end is None else end
+        if not (isinstance(sep, str) and isinstance(end, str)):
+            raise _Unsafe()
+        size = written + len(end)
+        parts = []
+        for arg in args:
+            parts.append(str(_guard_value(arg)))
+            size += len(parts[-1]) + (len(sep) if len(parts) > 1 else 0)
+            if size > FAST_PATH_MAX_SIZE:
+                raise _Unsafe()
+        if size > FAST_PATH_MAX_SIZE:
+            raise _Unsafe()
+        written = size
+        out.write(sep.join(parts) + end)
+    
+    namespace = {
+        "__builtins__": {
+            **SAFE_BUILTINS, "print": _print, "str": _safe_str, "__import__": _import_math
+        },
+        "__name__": "__main__",
+        **_GUARDS,
+    }
+    ident = threading.get_ident()
+    watchdog = threading.Timer(FAST_PATH_TIMEOUT, _raise_in_thread, (ident, _Unsafe))
+    watchdog.start()
+    try:
+        try:
+            exec(code_obj, namespace)
+        except BaseException:
+            # Error, guarda o watchdog: el worker da el resultado (y traceback) reales
+            return None
+        finally:
+            # El watchdog puede disparar entre el fin de exec y cancel(): esperar a que
+            # termine y borrar la excepción pendiente para que no salte en el pool de hilos
+            watchdog.cancel()
+            watchdog.join()
+            _raise_in_thread(ident, None)
+    except _Unsafe:
+        return None
+    return {"status": "success", "output": out.getvalue(), "error": None}
+
+# Resultados de la ruta rápida por hash del código. Lo que pasa _fast_path_ok es
+# determinista y sin efectos (sin E/S, solo math), así que repetir da la misma salida
+FAST_CACHE_SIZE = 256
+FAST_CACHE: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+def _code_key(code: str) -> bytes:
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+
+def _cached_fast_result(key: bytes) -> Optional[Dict[str, Any]]:
+    result = FAST_CACHE.get(key)
+    if result is not None:
+        FAST_CACHE.move_to_end(key)
+    return result
+
+def _cache_fast_result(key: bytes, result: Dict[str, Any]):
+    FAST_CACHE[key] = result
+    if len(FAST_CACHE) > FAST_CACHE_SIZE:
+        FAST_CACHE.popitem(last=False)
+
+async def run_fast(code: str) -> Optional[Dict[str, Any]]:
+    """Ruta rápida en proceso; None si el código debe ir al pool"""
+    code_obj = _fast_compile(code)
+    if code_obj is None:
+        return None
+    try:
+        return await asyncio.to_thread(_fast_exec, code_obj)
+    except _Unsafe:
+        return None
+
+async def run_in_subprocess(code: str) -> Dict[str, Any]:
+    """Ejecución en un intérprete nuevo (cuando el pool no está disponible)"""
+    try:
+        # El código llega por stdin: sin archivo temporal que escribir y borrar
+        proc = await asyncio.create_subprocess_exec(
+            PYTHON_EXECUTABLE, *PYTHON_FLAGS, *RUNNER_ARGS,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
         )
         
-        os.unlink(temp_path)
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(code.encode("utf-8")), timeout=EXEC_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {
+                "status": "error",
+                "output": "",
+                "error": f"Tiempo de ejecución excedido ({EXEC_TIMEOUT}s)"
+            }
         
-        if result.returncode == 0:
+        output = stdout.decode("utf-8", errors="replace")
+        if proc.returncode == 0:
             return {
                 "status": "success",
-                "output": result.stdout,
+                "output": output,
                 "error": None
             }
         else:
             return {
                 "status": "error",
-                "output": result.stdout,
-                "error": result.stderr
+                "output": output,
+                "error": stderr.decode("utf-8", errors="replace")
             }
             
-    except subprocess.TimeoutExpired:
-        try: os.unlink(temp_path)
-        except: pass
+    except Exception as e:
         return {
             "status": "error",
             "output": "",
-            "error": "Tiempo de ejecución excedido (10s)"
+            "error": f"Error: {str(e)}"
         }
-    except Exception as e:
-        try: os.unlink(temp_path)
-        except: pass
+
+async def stream_in_subprocess(code: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Ejecuta en un intérprete nuevo emitiendo la salida según se produce
+    
+    Yields:
+        {"type": "output", "data": texto} por cada bloque de stdout y
+        un último {"type": "status", "status": ..., "error": ...}
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EXEC_TIMEOUT
+    proc = await asyncio.create_subprocess_exec(
+        PYTHON_EXECUTABLE, *PYTHON_FLAGS, "-u", *RUNNER_ARGS,  # -u: cada print llega al momento
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # stderr se lee aparte para que no se llene su pipe mientras leemos stdout
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        proc.stdin.write(code.encode("utf-8"))
+        await proc.stdin.drain()
+        proc.stdin.close()
+        
+        while True:
+            chunk = await asyncio.wait_for(proc.stdout.read(65536), deadline - loop.time())
+            if not chunk:
+                break
+            text = decoder.decode(chunk)
+            if text:
+                yield {"type": "output", "data": text}
+        
+        await asyncio.wait_for(proc.wait(), max(0, deadline - loop.time()))
+        stderr = await stderr_task
+        if proc.returncode == 0:
+            yield {"type": "status", "status": "success", "error": None}
+        else:
+            yield {"type": "status", "status": "error", "error": stderr.decode("utf-8", errors="replace")}
+    except asyncio.TimeoutError:
+        yield {"type": "status", "status": "error", "error": f"Tiempo de ejecución excedido ({EXEC_TIMEOUT}s)"}
+    finally:
+        # También al desconectarse el cliente: Starlette cancela el generador
+        stderr_task.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+class ExecRequest(BaseModel):
+    code: str = ""
+
+@app.post("/api/execute")
+async def execute_code(req: ExecRequest, response: Response):
+    """Ejecutor básico de código"""
+    code = req.code
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Ejecutando código: %s...", code[:50])
+    
+    if not code.strip():
         return {
             "status": "error",
             "output": "",
-            "error": f"Error: {str(e)}"
+            "error": "No hay código para ejecutar"
         }
+    
+    # Fragmentos triviales en proceso (o de la caché); el resto a un worker precalentado
+    # si el pool está activo, o a un intérprete nuevo
+    key = _code_key(code)
+    result = _cached_fast_result(key)
+    if result is not None:
+        response.headers["X-RepletO-Cache"] = "hit"
+        return result
+    result = await run_fast(code)
+    if result is not None:
+        _cache_fast_result(key, result)
+        return result
+    if worker_pool is not None:
+        return await worker_pool.run(code)
+    return await run_in_subprocess(code)
+
+@app.post("/api/execute/stream")
+async def execute_code_stream(req: ExecRequest):
+    """Ejecutor con la salida en vivo como Server-Sent Events"""
+    code = req.code
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Ejecutando código (stream): %s...", code[:50])
+    
+    async def events():
+        if not code.strip():
+            event = {"type": "status", "status": "error", "error": "No hay código para ejecutar"}
+            yield f"data: {json.dumps(event)}\n\n"
+            return
+        async for event in stream_in_subprocess(code):
+            yield f"data: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
 
-# Montar frontend
+# Servir frontend: en desarrollo (REPLETO_DEV=1) desde disco para ver los cambios al
+# momento; si no, desde una tabla en memoria construida al arrancar
 frontend_path = "frontend"
-if os.path.exists(frontend_path):
+DEV_MODE = os.getenv("REPLETO_DEV", "0") == "1"
+
+def _load_assets(directory: str) -> Dict[str, Tuple[Page, str]]:
+    """Lee y precomprime todos los ficheros del frontend: ruta relativa -> (variantes, tipo)"""
+    assets = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, directory).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                body = f.read()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            assets[rel] = (_page(body), media_type)
+    return assets
+
+if FRONTEND_EXISTS and DEV_MODE:
     logger.info(f"Montando frontend desde: {os.path.abspath(frontend_path)}")
     app.mount("/frontend", StaticFiles(directory=frontend_path, html=True), name="frontend")
+elif FRONTEND_EXISTS:
+    ASSETS = _load_assets(frontend_path)
+    logger.info(f"Frontend cargado en memoria: {len(ASSETS)} ficheros de {os.path.abspath(frontend_path)}")
+    
+    @app.get("/frontend")
+    async def frontend_redirect():
+        return RedirectResponse("/frontend/")
+    
+    @app.get("/frontend/{path:path}")
+    async def frontend_asset(path: str, request: Request):
+        # Igual que StaticFiles(html=True): los directorios sirven su index.html
+        if path == "" or path.endswith("/"):
+            path += "index.html"
+        asset = ASSETS.get(path)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        page, media_type = asset
+        return _cached_response(request, page, media_type)
 else:
     logger.error(f"Frontend no encontrado en: {os.path.abspath(frontend_path)}")
 
@@ -262,4 +1054,29 @@ else:
 if __name__ == "__main__":
     import uvicorn
     logger.info("🎨 RepletO v2.0 SIMPLE - Iniciando sin auto-reload...")
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    
+    # uvloop no existe en Windows: caer al loop de asyncio si falta
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+    
+    # Con varios workers uvicorn necesita la app como import string
+    uvicorn.run(
+        "simple_server:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=False,
+        workers=WEB_WORKERS,
+        loop=loop_impl,
+        http=http_impl,
+        log_level="warning",
+        access_log=False
+    )
\ No newline at end of file
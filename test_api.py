@@ -1,9 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 # Probar API de RepletO
 url = "http://localhost:8000/api/execute"
 
+# Sesión compartida: reutiliza la conexión (keep-alive) entre peticiones
+SESSION = requests.Session()
+SESSION.headers["Content-Type"] = "application/json"
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 codigo_prueba = """
 print("=== PRUEBA REPLETO V2.0 ===")
 print("Hola desde RepletO!")
@@ -30,7 +36,7 @@ data = {"code": codigo_prueba}
 
 try:
     print("Enviando solicitud a RepletO...")
-    response = requests.post(url, json=data, timeout=15)
+    response = SESSION.post(url, json=data, timeout=15)
     print(f"Status Code: {response.status_code}")
     
     if response.status_code == 200:
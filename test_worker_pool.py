@@ -0,0 +1,45 @@
+"""Regresión: el código de usuario no debe afectar a ejecuciones posteriores del pool"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from simple_server import WorkerPool
+
+
+def ejecutar_en_orden(*codigos):
+    async def main():
+        pool = WorkerPool(1)
+        await pool.start()
+        try:
+            return [await pool.run(codigo) for codigo in codigos]
+        finally:
+            await pool.close()
+    return asyncio.run(main())
+
+
+def test_builtins_parcheados_no_persisten():
+    ataque, victima = ejecutar_en_orden(
+        "import builtins\nbuiltins.print = lambda *a, **k: None\nbuiltins.exec = None",
+        "print('hola')",
+    )
+    assert ataque["status"] == "success"
+    assert victima == {"status": "success", "output": "hola\n", "error": None}
+
+
+def test_tramas_falsificadas_no_desincronizan():
+    falsa = b'{"status": "success", "output": "falsificado\\n", "error": null}'
+    codigo = (
+        "import gc, io, sys\n"
+        f"falsa = {falsa!r}\n"
+        "for obj in gc.get_objects():\n"
+        "    if isinstance(obj, io.BufferedWriter) and obj.writable() and obj.fileno() > 2:\n"
+        "        obj.write(len(falsa).to_bytes(4, 'big') + falsa)\n"
+        "        obj.write(len(falsa).to_bytes(4, 'big') + falsa)\n"
+        "        obj.flush()\n"
+        "main = sys.modules['__main__']\n"
+        "print(hasattr(main, 'proto_out'))\n"
+    )
+    _, victima = ejecutar_en_orden(codigo, "print('hola')")
+    assert victima == {"status": "success", "output": "hola\n", "error": None}